@@ -0,0 +1,186 @@
+"""
+Benchmarks DAPPr against a local mock of the DSpace 6 REST API (dappr.mock_server).
+
+The mock server runs in a separate process, so its memory and CPU use do not show up in the
+measurements. Each benchmark prints one line per measurement:
+
+    python benchmarks/benchmark.py                          # every benchmark
+    python benchmarks/benchmark.py extent cache --latency 0.05
+    python benchmarks/benchmark.py --json > results.json
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from dappr import DAPPr  # noqa: E402
+
+EMAIL = "user@example.com"
+PASSWORD = "password"
+BENCHMARKS = ["extent", "pagination", "transfer", "cache"]
+
+
+class MockServerProcess(object):
+    """
+    Runs python -m dappr.mock_server in a subprocess for the duration of a with block."""
+
+    def __init__(self, **options):
+        self.command = [sys.executable, "-m", "dappr.mock_server"]
+        for option, value in sorted(options.items()):
+            self.command.append("--{}".format(option.replace("_", "-")))
+            if value is not True:
+                self.command.append(str(value))
+        self.process = None
+        self.base_url = None
+
+    def __enter__(self):
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+        self.process = subprocess.Popen(self.command, stdout=subprocess.PIPE, cwd=root, universal_newlines=True)
+        self.base_url = self.process.stdout.readline().strip()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        self.process.wait()
+
+
+def client(server, **options):
+    return DAPPr(server.base_url, EMAIL, PASSWORD, **options)
+
+
+def timed(function, *args, **kwargs):
+    started = time.time()
+    result = function(*args, **kwargs)
+    return result, time.time() - started
+
+
+def benchmark_extent(args, report):
+    with MockServerProcess(communities=1, depth=args.depth, collections=args.collections, items=args.items,
+                           bitstreams=args.bitstreams, latency=args.latency) as server:
+        dspace = client(server, page_size=args.page_size)
+        handle = dspace.get_top_communities(expand=())[0]["handle"]
+        serial_extent, serial = timed(dspace.get_handle_extent, handle, workers=1)
+        concurrent_extent, concurrent = timed(dspace.get_handle_extent, handle, workers=args.workers)
+    if serial_extent != concurrent_extent:
+        raise AssertionError("serial and concurrent extents differ: {} != {}".format(serial_extent, concurrent_extent))
+    report("extent", "serial seconds", serial)
+    report("extent", "concurrent seconds ({} workers)".format(args.workers), concurrent)
+    report("extent", "speedup", serial / concurrent)
+
+
+def benchmark_pagination(args, report):
+    with MockServerProcess(communities=1, depth=1, collections=1, items=args.items * args.collections * args.depth,
+                           bitstreams=args.bitstreams) as server:
+        dspace = client(server, page_size=args.page_size)
+
+        def peak(function):
+            tracemalloc.start()
+            try:
+                count = function()
+                return count, tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        listed, list_peak = peak(lambda: len(dspace.get_items()))
+        iterated, iter_peak = peak(lambda: sum(1 for _ in dspace.iter_items()))
+    report("pagination", "items", listed)
+    report("pagination", "get_items peak MB", list_peak / 1e6)
+    report("pagination", "iter_items peak MB (page_size={})".format(args.page_size), iter_peak / 1e6)
+    if listed != iterated:
+        raise AssertionError("get_items and iter_items returned {} and {} items".format(listed, iterated))
+
+
+def benchmark_transfer(args, report):
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, "upload.bin")
+        size = args.file_size * 1024 * 1024
+        with open(path, "wb") as f:
+            for _ in range(args.file_size):
+                f.write(os.urandom(1024 * 1024))
+        with MockServerProcess(communities=1, depth=1, collections=1, items=1, bitstreams=0) as server:
+            dspace = client(server)
+            item_uuid = dspace.get_items(expand=())[0]["uuid"]
+            bitstream, upload = timed(dspace.post_item_bitstream, item_uuid, path)
+            _, download = timed(dspace.download_bitstream, bitstream["uuid"], os.path.join(directory, "download.bin"))
+        report("transfer", "upload MB/s ({} MB)".format(args.file_size), size / 1e6 / upload)
+        report("transfer", "download MB/s ({} MB)".format(args.file_size), size / 1e6 / download)
+    finally:
+        shutil.rmtree(directory)
+
+
+def benchmark_cache(args, report):
+    directory = tempfile.mkdtemp()
+    try:
+        with MockServerProcess(communities=1, depth=1, collections=1, items=args.items, bitstreams=args.bitstreams,
+                               latency=args.latency, etags=True) as server:
+            uncached = client(server)
+            uuids = [item["uuid"] for item in uncached.get_items(expand=())]
+            # a skewed workload: a few items are looked up far more often than the rest
+            lookups = [uuids[min(int(random.expovariate(10.0 / len(uuids))), len(uuids) - 1)] for _ in range(args.lookups)]
+            _, uncached_seconds = timed(lambda: [uncached.get_item(uuid) for uuid in lookups])
+            cached = client(server, cache_size=args.cache_size)
+            _, cached_seconds = timed(lambda: [cached.get_item(uuid) for uuid in lookups])
+            report("cache", "object cache hit rate (cache_size={})".format(args.cache_size), cached.cache.hits / float(len(lookups)))
+            report("cache", "uncached lookup seconds", uncached_seconds)
+            report("cache", "cached lookup seconds", cached_seconds)
+
+            path = os.path.join(directory, "responses.sqlite")
+            collection_uuid = uncached.get_collections(expand=())[0]["uuid"]
+            first_run = client(server, response_cache_path=path)
+            _, cold = timed(first_run.get_collection_items, collection_uuid)
+            second_run = client(server, response_cache_path=path)
+            _, warm = timed(second_run.get_collection_items, collection_uuid)
+            lookups = second_run.response_cache.hits + second_run.response_cache.misses
+            report("cache", "response cache hit rate on re-run", second_run.response_cache.hits / float(lookups or 1))
+            report("cache", "response cache cold seconds", cold)
+            report("cache", "response cache warm seconds", warm)
+    finally:
+        shutil.rmtree(directory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DAPPr against a local mock DSpace server.")
+    parser.add_argument("benchmarks", nargs="*", help="benchmarks to run: {} (default: all)".format(", ".join(BENCHMARKS)))
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds the mock server delays each response")
+    parser.add_argument("--depth", type=int, default=3, help="levels of communities")
+    parser.add_argument("--collections", type=int, default=3, help="collections per community")
+    parser.add_argument("--items", type=int, default=200, help="items per collection")
+    parser.add_argument("--bitstreams", type=int, default=2, help="bitstreams per item")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--file-size", type=int, default=64, help="MB uploaded and downloaded by the transfer benchmark")
+    parser.add_argument("--lookups", type=int, default=1000, help="object lookups made by the cache benchmark")
+    parser.add_argument("--cache-size", type=int, default=64)
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error("unknown benchmark {}".format(name))
+
+    results = []
+
+    def report(benchmark, measurement, value):
+        results.append({"benchmark": benchmark, "measurement": measurement, "value": value})
+        if not args.json:
+            print("{:<12} {:<48} {:>12.3f}".format(benchmark, measurement, value))
+            sys.stdout.flush()
+
+    random.seed(0)
+    for name in args.benchmarks or BENCHMARKS:
+        globals()["benchmark_{}".format(name)](args, report)
+    if args.json:
+        print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
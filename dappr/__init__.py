@@ -1 +1,40 @@
-from .client import DAPPr
+import sys
+
+if sys.version_info[:2] >= (3, 7):
+    # Python 3.7+: names are imported when first used, so that e.g. the command line starts without loading requests
+    import importlib
+
+    _LAZY = {
+        "DAPPr": ".client",
+        "HierarchyIndex": ".index",
+        "MetadataRecord": ".metadata",
+        "MetricsCollector": ".metrics",
+        "Bitstream": ".objects",
+        "Collection": ".objects",
+        "Community": ".objects",
+        "Item": ".objects",
+        "ExtentReport": ".report",
+        "AsyncDAPPr": ".async_client",
+    }
+
+    __all__ = sorted(_LAZY)
+
+    def __getattr__(name):
+        if name not in _LAZY:
+            raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(globals()) | set(_LAZY))
+else:
+    from .client import DAPPr
+    from .index import HierarchyIndex
+    from .metadata import MetadataRecord
+    from .metrics import MetricsCollector
+    from .objects import Bitstream, Collection, Community, Item
+    from .report import ExtentReport
+
+    if sys.version_info >= (3, 6):
+        from .async_client import AsyncDAPPr
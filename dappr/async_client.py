@@ -0,0 +1,356 @@
+import asyncio
+import json
+import os
+
+from urllib.parse import quote
+
+from .client import DSpaceError, IDEMPOTENT_METHODS, RETRY_STATUSES, _DAPPrBase
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class AsyncResponse(object):
+    """
+    The status, headers and body of a response, read before its connection was released."""
+
+    __slots__ = ("status_code", "headers", "content")
+
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8")
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class AsyncDAPPr(_DAPPrBase):
+    """
+    An asyncio version of the DAPPr client, with coroutine versions of the
+    community, collection, item, bitstream and handle methods.
+
+    At most max_concurrency requests are in flight at once. Log in with
+    `async with AsyncDAPPr(...) as dspace:` or `await dspace.login()`."""
+
+    def __init__(self, base_url=None, email=None, password=None, instance_name=None, page_size=100, expand="all",
+                 max_concurrency=100, connect_timeout=10, read_timeout=300, max_retries=3, backoff_factor=0.5, backoff_max=60):
+        if aiohttp is None:
+            raise ImportError("AsyncDAPPr requires aiohttp. Install it with pip install dappr[async]")
+        self.page_size = page_size
+        self.expand = expand
+        self.max_concurrency = max_concurrency
+        self.timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.session = None
+        self._token = None
+        self._password = self._configure(base_url, email, password, instance_name)
+
+    async def __aenter__(self):
+        await self.login()
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        await self.close()
+
+    async def login(self):
+        if self.session is None:
+            # the limits are created here so that they belong to the running event loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._login_lock = asyncio.Lock()
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout, cookie_jar=aiohttp.CookieJar(unsafe=True))
+        url = self.base_url + "/rest/login"
+        params = {"email": self.email, "password": self._password}
+        async with self.session.post(url, params=params) as response:
+            if response.status != 200:
+                raise DSpaceError("Error logging in - {}".format(await response.text()))
+            token = response.cookies["JSESSIONID"].value
+        self.session.cookie_jar.update_cookies({"JSESSIONID": token})
+        self._token = token
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _session_expired(self, token):
+        async with self._login_lock:
+            if token != self._token:
+                return True
+            async with self.session.get(self.base_url + "/rest/status", headers={"Accept": "application/json"}) as response:
+                try:
+                    if (await response.json(content_type=None)).get("authenticated"):
+                        return False
+                except ValueError:
+                    pass
+            await self.login()
+            return True
+
+    async def _request(self, method, url, params=None, expected_response=200, data=None, json=None, json_expected=True, headers=None):
+        """
+        Sends a request and returns an AsyncResponse with its body already read."""
+
+        expected_responses = expected_response if isinstance(expected_response, (list, tuple)) else [expected_response]
+        idempotent = method in IDEMPOTENT_METHODS
+        position = data.tell() if hasattr(data, "seek") and hasattr(data, "tell") else None
+        retry = 0
+        logged_in_again = False
+        while True:
+            if position is not None:
+                data.seek(position)
+            token = self._token
+            try:
+                async with self._semaphore:
+                    async with self.session.request(method, url, params=params, data=data, json=json, headers=headers) as raw_response:
+                        response = AsyncResponse(raw_response.status, raw_response.headers, await raw_response.read())
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if not idempotent or retry >= self.max_retries:
+                    raise
+                await asyncio.sleep(self._retry_delay(retry))
+                retry += 1
+                continue
+
+            if response.status_code in expected_responses:
+                break
+            if response.status_code in (401, 403) and not logged_in_again and await self._session_expired(token):
+                logged_in_again = True
+                continue
+            if idempotent and response.status_code in RETRY_STATUSES and retry < self.max_retries:
+                await asyncio.sleep(self._retry_delay(retry, response))
+                retry += 1
+                continue
+            raise DSpaceError("DSpace server responded with {}. Expected {}".format(response.status_code, expected_response), response.status_code)
+
+        if json_expected:
+            try:
+                response.json()
+            except Exception:
+                raise DSpaceError("DSpace server responded with status {}, but returned a non-JSON document".format(response.status_code))
+
+        return response
+
+    async def _get(self, endpoint, params=None, expected_response=200, json_expected=True, expand=None):
+        url = self.base_url + endpoint
+        params = dict(params) if params else {}
+        expand = self._expand_param(expand)
+        if expand:
+            params["expand"] = expand
+        params.setdefault("limit", 1000000)
+        return await self._request("GET", url, params=params, expected_response=expected_response, json_expected=json_expected)
+
+    async def _get_json(self, endpoint, expand=None):
+        response = await self._get(endpoint, expand=expand)
+        return response.json()
+
+    async def _get_pages(self, endpoint, params=None, page_size=None, expand=None, offset=0):
+        page_size = page_size or self.page_size
+        while True:
+            page_params = dict(params) if params else {}
+            page_params["limit"] = page_size
+            page_params["offset"] = offset
+            response = await self._get(endpoint, params=page_params, expand=expand)
+            page = response.json()
+            for obj in page:
+                yield obj
+            # DSpace filters out the objects the user cannot see after taking the page, so only an empty page is the end
+            if not page:
+                break
+            offset += page_size
+
+    async def _get_list(self, endpoint, expand=None):
+        return [obj async for obj in self._get_pages(endpoint, expand=expand)]
+
+    async def _post_json(self, endpoint, params=None, expected_response=200, json_expected=True, json=None):
+        url = self.base_url + endpoint
+        headers = {"Accept": "application/json"}
+        return await self._request("POST", url, params=params, json=json, expected_response=expected_response, json_expected=json_expected, headers=headers)
+
+    async def _post_big_data(self, endpoint, params=None, expected_response=200, json_expected=True, data=None, path=None):
+        url = self.base_url + endpoint
+        headers = {
+            "Accept": "application/json",
+            "Content-Type": "multipart/form-data",
+            "Content-Disposition": "attachment; filename=%s" % quote(os.path.basename(path))
+        }
+        return await self._request("POST", url, params=params, data=data, expected_response=expected_response, json_expected=json_expected, headers=headers)
+
+    async def _put(self, endpoint, json=None, expected_response=200, json_expected=False):
+        url = self.base_url + endpoint
+        headers = {"Accept": "application/json"}
+        return await self._request("PUT", url, json=json, expected_response=expected_response, json_expected=json_expected, headers=headers)
+
+    async def _delete(self, endpoint, expected_response=200, json_expected=False):
+        url = self.base_url + endpoint
+        headers = {"Accept": "application/json"}
+        return await self._request("DELETE", url, expected_response=expected_response, json_expected=json_expected, headers=headers)
+
+    # public functions
+    async def logout(self):
+        endpoint = "/rest/logout"
+        await self._post_json(endpoint, json_expected=False)
+
+    # communities
+    def iter_communities(self, page_size=None, expand=None):
+        return self._get_pages("/rest/communities", page_size=page_size, expand=expand)
+
+    async def get_communities(self, expand=None):
+        return await self._get_list("/rest/communities", expand=expand)
+
+    def iter_top_communities(self, page_size=None, expand=None):
+        return self._get_pages("/rest/communities/top-communities", page_size=page_size, expand=expand)
+
+    async def get_top_communities(self, expand=None):
+        return await self._get_list("/rest/communities/top-communities", expand=expand)
+
+    async def get_community(self, community_uuid, expand=None):
+        return await self._get_json("/rest/communities/{}".format(community_uuid), expand=expand)
+
+    def iter_community_collections(self, community_uuid, page_size=None, expand=None):
+        return self._get_pages("/rest/communities/{}/collections".format(community_uuid), page_size=page_size, expand=expand)
+
+    async def get_community_collections(self, community_uuid, expand=None):
+        return await self._get_list("/rest/communities/{}/collections".format(community_uuid), expand=expand)
+
+    def iter_community_subcommunities(self, community_uuid, page_size=None, expand=None):
+        return self._get_pages("/rest/communities/{}/communities".format(community_uuid), page_size=page_size, expand=expand)
+
+    async def get_community_subcommunities(self, community_uuid, expand=None):
+        return await self._get_list("/rest/communities/{}/communities".format(community_uuid), expand=expand)
+
+    async def post_community(self, community_dictionary):
+        response = await self._post_json("/rest/communities/", json=community_dictionary)
+        return response.json()
+
+    async def post_community_collection(self, community_uuid, collection_dictionary):
+        response = await self._post_json("/rest/communities/{}/collections".format(community_uuid), json=collection_dictionary)
+        return response.json()
+
+    async def post_community_subcommunity(self, community_uuid, community_dictionary):
+        response = await self._post_json("/rest/communities/{}/communities".format(community_uuid), json=community_dictionary)
+        return response.json()
+
+    async def put_community(self, community_uuid, community_dictionary):
+        return await self._put("/rest/communities/{}".format(community_uuid), json=community_dictionary)
+
+    async def delete_community(self, community_uuid):
+        return await self._delete("/rest/communities/{}".format(community_uuid))
+
+    async def delete_community_collection(self, community_uuid, collection_uuid):
+        return await self._delete("/rest/communities/{}/collections/{}".format(community_uuid, collection_uuid))
+
+    async def delete_community_subcommunity(self, community_uuid, subcommunity_uuid):
+        return await self._delete("/rest/communities/{}/communities/{}".format(community_uuid, subcommunity_uuid))
+
+    # collections
+    def iter_collections(self, page_size=None, expand=None):
+        return self._get_pages("/rest/collections", page_size=page_size, expand=expand)
+
+    async def get_collections(self, expand=None):
+        return await self._get_list("/rest/collections", expand=expand)
+
+    async def get_collection(self, collection_uuid, expand=None):
+        return await self._get_json("/rest/collections/{}".format(collection_uuid), expand=expand)
+
+    def iter_collection_items(self, collection_uuid, page_size=None, expand=None):
+        return self._get_pages("/rest/collections/{}/items".format(collection_uuid), page_size=page_size, expand=expand)
+
+    async def get_collection_items(self, collection_uuid, expand=None):
+        return await self._get_list("/rest/collections/{}/items".format(collection_uuid), expand=expand)
+
+    async def post_collection_item(self, collection_uuid, item_dictionary):
+        response = await self._post_json("/rest/collections/{}/items".format(collection_uuid), json=item_dictionary)
+        return response.json()
+
+    async def put_collection(self, collection_uuid, collection_dictionary):
+        return await self._put("/rest/collections/{}".format(collection_uuid), json=collection_dictionary)
+
+    async def delete_collection(self, collection_uuid):
+        return await self._delete("/rest/collections/{}".format(collection_uuid))
+
+    async def delete_collection_item(self, collection_uuid, item_uuid):
+        return await self._delete("/rest/collections/{}/items/{}".format(collection_uuid, item_uuid))
+
+    # items
+    def iter_items(self, page_size=None, expand=None):
+        return self._get_pages("/rest/items", page_size=page_size, expand=expand)
+
+    async def get_items(self, expand=None):
+        return await self._get_list("/rest/items", expand=expand)
+
+    async def get_item(self, item_uuid, expand=None):
+        return await self._get_json("/rest/items/{}".format(item_uuid), expand=expand)
+
+    async def get_item_metadata(self, item_uuid):
+        return await self._get_json("/rest/items/{}/metadata".format(item_uuid), expand=())
+
+    def iter_item_bitstreams(self, item_uuid, page_size=None, expand=None):
+        return self._get_pages("/rest/items/{}/bitstreams".format(item_uuid), page_size=page_size, expand=expand)
+
+    async def get_item_bitstreams(self, item_uuid, expand=None):
+        return await self._get_list("/rest/items/{}/bitstreams".format(item_uuid), expand=expand)
+
+    async def post_item_metadata(self, item_uuid, metadata_list):
+        return await self._post_json("/rest/items/{}/metadata".format(item_uuid), json=metadata_list, json_expected=False)
+
+    async def post_item_bitstream(self, item_uuid, bitstream_path):
+        endpoint = "/rest/items/{}/bitstreams".format(item_uuid)
+        with open(bitstream_path, "rb") as f:
+            response = await self._post_big_data(endpoint, data=f, path=bitstream_path)
+        return response.json()
+
+    async def put_item_metadata(self, item_uuid, metadata_list):
+        return await self._put("/rest/items/{}/metadata".format(item_uuid), json=metadata_list, json_expected=False)
+
+    async def delete_item(self, item_uuid):
+        return await self._delete("/rest/items/{}".format(item_uuid))
+
+    async def delete_item_metadata(self, item_uuid):
+        return await self._delete("/rest/items/{}/metadata".format(item_uuid))
+
+    async def delete_item_bitstream(self, item_uuid, bitstream_uuid):
+        return await self._delete("/rest/items/{}/bitstreams/{}".format(item_uuid, bitstream_uuid))
+
+    # bitstreams
+    def iter_bitstreams(self, page_size=None, expand=None):
+        return self._get_pages("/rest/bitstreams", page_size=page_size, expand=expand)
+
+    async def get_bitstreams(self, expand=None):
+        return await self._get_list("/rest/bitstreams", expand=expand)
+
+    async def get_bitstream(self, bitstream_uuid, expand=None):
+        return await self._get_json("/rest/bitstreams/{}".format(bitstream_uuid), expand=expand)
+
+    async def get_bitstream_policy(self, bitstream_uuid):
+        return await self._get_json("/rest/bitstreams/{}/policy".format(bitstream_uuid), expand=())
+
+    async def get_bitstream_data(self, bitstream_uuid):
+        response = await self._get("/rest/bitstreams/{}/retrieve".format(bitstream_uuid), expand=(), json_expected=False)
+        return response
+
+    async def put_bitstream_policy(self, bitstream_uuid, policy_list):
+        endpoint = "/rest/bitstreams/{}".format(bitstream_uuid)
+        bitstream = await self._get_json(endpoint, expand=())
+        bitstream["policies"] = policy_list
+        return await self._put(endpoint, json=bitstream, json_expected=False)
+
+    async def put_bitstream(self, bitstream_uuid, bitstream):
+        return await self._put("/rest/bitstreams/{}".format(bitstream_uuid), json=bitstream, json_expected=False)
+
+    async def delete_bitstream(self, bitstream_uuid):
+        return await self._delete("/rest/bitstreams/{}".format(bitstream_uuid))
+
+    async def delete_bitstream_policy(self, bitstream_uuid, policy_uuid):
+        return await self._delete("/rest/bitstreams/{}/policy/{}".format(bitstream_uuid, policy_uuid))
+
+    # handle
+    async def get_handle(self, handle, expand=None):
+        return await self._get_json("/rest/handle/{}".format(handle), expand=expand)
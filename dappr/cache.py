@@ -0,0 +1,154 @@
+import sqlite3
+import threading
+import time
+
+from collections import OrderedDict
+
+clock = getattr(time, "monotonic", time.time)
+
+
+def _related_uuids(obj):
+    """
+    Returns the uuid of a DSpace object and of the objects nested one level within it,
+    such as the bitstreams of an item or the parent community of a collection."""
+
+    uuids = set()
+    if not isinstance(obj, dict):
+        return uuids
+    if obj.get("uuid"):
+        uuids.add(obj["uuid"])
+    for value in obj.values():
+        nested = value if isinstance(value, list) else [value]
+        for nested_obj in nested:
+            if isinstance(nested_obj, dict) and nested_obj.get("uuid"):
+                uuids.add(nested_obj["uuid"])
+    return uuids
+
+
+class ObjectCache(object):
+    """
+    A thread-safe in-process cache of DSpace objects with least-recently-used eviction
+    once it holds maxsize objects, and expiry of objects older than ttl seconds.
+
+    Each object is also indexed by the uuids of the objects it contains, so that
+    invalidating a uuid drops every cached object that could show a stale copy of it."""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._keys_by_uuid = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Returns the object cached under key, or None."""
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (self.ttl is not None and clock() - entry[0] > self.ttl):
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.pop(key)
+            self._entries[key] = entry
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, obj, uuids=None):
+        """
+        Caches obj under key, indexed by its own uuid, the uuids of the objects it contains, and uuids."""
+
+        uuids = _related_uuids(obj) | set(uuids or [])
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (clock(), obj, uuids)
+            for uuid in uuids:
+                self._keys_by_uuid.setdefault(uuid, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, *uuids):
+        """
+        Drops every cached object indexed by any of uuids."""
+
+        with self._lock:
+            for uuid in uuids:
+                for key in list(self._keys_by_uuid.get(uuid, [])):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_uuid.clear()
+
+    def _remove(self, key):
+        _, _, uuids = self._entries.pop(key)
+        for uuid in uuids:
+            keys = self._keys_by_uuid.get(uuid)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_uuid[uuid]
+
+
+class ResponseCache(object):
+    """
+    A persistent cache of JSON GET responses in a SQLite file, stored with the
+    ETag and Last-Modified headers needed to revalidate them on a later run."""
+
+    def __init__(self, path):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, body BLOB NOT NULL, stored REAL NOT NULL)")
+
+    def get(self, key):
+        """
+        Returns a dictionary with the etag, last_modified and body cached under key, or None."""
+
+        with self._lock:
+            row = self._connection.execute("SELECT etag, last_modified, body FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return {"etag": row[0], "last_modified": row[1], "body": bytes(row[2])}
+
+    def set(self, key, body, etag=None, last_modified=None):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, etag, last_modified, body, stored) VALUES (?, ?, ?, ?, ?)",
+                (key, etag, last_modified, sqlite3.Binary(body), time.time()))
+
+    def record(self, hit):
+        """
+        Counts a lookup that was served from the cache after revalidation (hit) or had to be downloaded again."""
+
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def delete(self, key):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses")
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,318 @@
+import argparse
+import csv
+import json
+import os
+import sys
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+DESCRIPTION = """
+Runs DAPPr operations from the command line. Each operation runs one job for each target
+given as arguments or each row of a CSV or JSON --manifest, with --workers jobs in parallel
+over one logged-in session. With --checkpoint, finished jobs are recorded as they complete,
+and running the same command again skips them, so an interrupted run resumes where it stopped."""
+
+
+class JobFailed(Exception):
+    """
+    Raised by an operation when a job failed after changing something, with the fields to update the job with so that running it again only repeats what failed."""
+
+    def __init__(self, message, retry=None):
+        super(JobFailed, self).__init__(message)
+        self.retry = retry
+
+
+def _add_connection_arguments(parser):
+    group = parser.add_argument_group("connection")
+    group.add_argument("--instance", help="name of a configured instance")
+    group.add_argument("--base-url", help="base URL of the DSpace instance, instead of a configured instance")
+    group.add_argument("--email", help="email address to log in with")
+    group.add_argument("--password", default=os.environ.get("DAPPR_PASSWORD"), help="password to log in with (default: $DAPPR_PASSWORD)")
+
+
+def _add_job_arguments(parser):
+    group = parser.add_argument_group("jobs")
+    group.add_argument("--manifest", help="CSV or JSON file with one job per row, using the argument names as columns")
+    group.add_argument("--workers", type=int, default=8, help="jobs (or requests, for a single job) run in parallel (default: 8)")
+    group.add_argument("--checkpoint", help="file recording finished jobs, to resume an interrupted run")
+    group.add_argument("--output", help="file to write the results to as JSON lines (default: standard output)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="dappr", description=DESCRIPTION)
+    subparsers = parser.add_subparsers(dest="command", metavar="command")
+    subparsers.required = True
+
+    extent = subparsers.add_parser("extent", help="total bytes of bitstreams under handles")
+    extent.add_argument("handle", nargs="*", help="handles of Items, Collections, or Communities")
+    extent.add_argument("--report", help="write a report by collection, series, format and bundle for each handle to this directory (CSV or JSON with --format)")
+    extent.add_argument("--format", choices=["csv", "json"], default="csv", help="format of --report files (default: csv)")
+
+    export = subparsers.add_parser("export", help="mirror the bitstreams under handles into a directory")
+    export.add_argument("handle", nargs="*", help="handles of Items, Collections, or Communities")
+    export.add_argument("--dest", required=True, help="directory to export to")
+
+    ingest = subparsers.add_parser(
+        "ingest", help="create items with bitstreams in a collection",
+        description="Creates an item for each row of the --manifest. Columns: collection, files (paths separated by ;), license, "
+                    "item_uuid (to add files to an item created by an earlier run), and metadata values in columns named by key, "
+                    "e.g. dc.title, or as a JSON list in a metadata column.")
+    ingest.add_argument("--collection", help="UUID of the collection to create items in, unless given by the manifest")
+    ingest.add_argument("--license", action="store_true", help="add the default license to each item")
+
+    metadata = subparsers.add_parser("metadata", help="set, append, or remove metadata values of items")
+    metadata.add_argument("handle", nargs="?", help="handle of an Item")
+    metadata.add_argument("--key", help="metadata key, e.g. dc.title")
+    metadata.add_argument("--value", help="metadata value")
+    metadata.add_argument("--action", choices=["set", "append", "remove"], default="set", help="what to do with the value (default: set)")
+    metadata.add_argument("--dry-run", action="store_true", help="report the changes without writing them")
+
+    policy = subparsers.add_parser("policy", help="set the policies of the bitstreams under handles")
+    policy.add_argument("handle", nargs="*", help="handles of Items, Collections, or Communities")
+    policy.add_argument("--group", help="short name of a configured group")
+    policy.add_argument("--group-id", help="DSpace groupId")
+    policy.add_argument("--policy-action", default="READ", help="policy action (default: READ)")
+    policy.add_argument("--bundle", action="append", help="only change bitstreams in this bundle (can be repeated)")
+    policy.add_argument("--dry-run", action="store_true", help="count the changes without writing them")
+
+    for subparser in subparsers.choices.values():
+        _add_job_arguments(subparser)
+        _add_connection_arguments(subparser)
+    return parser
+
+
+def read_manifest(path):
+    """
+    Returns the rows of a CSV file, or the list of objects in a JSON file, or the objects of a JSON lines file."""
+
+    with open(path) as f:
+        if path.lower().endswith(".csv"):
+            return [dict((key, value) for key, value in row.items() if value not in (None, "")) for row in csv.DictReader(f)]
+        if path.lower().endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+
+def _split(value):
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return value
+    return [part.strip() for part in value.split(";") if part.strip()]
+
+
+def _truthy(value):
+    return value is True or str(value).strip().lower() in ("1", "true", "yes", "y")
+
+
+def build_jobs(parser, args):
+    rows = read_manifest(args.manifest) if args.manifest else []
+    if args.command in ("extent", "export", "policy"):
+        rows += [{"handle": handle} for handle in args.handle]
+        for row in rows:
+            if args.command == "export":
+                row.setdefault("dest", args.dest)
+            elif args.command == "policy":
+                for key, value in (("group", args.group), ("group_id", args.group_id), ("action", args.policy_action), ("bundle", args.bundle)):
+                    if value is not None:
+                        row.setdefault(key, value)
+        return rows
+    if args.command == "ingest":
+        for row in rows:
+            if args.collection:
+                row.setdefault("collection", args.collection)
+            if args.license:
+                row.setdefault("license", True)
+        return rows
+    if args.command == "metadata":
+        if args.handle:
+            if not args.key:
+                parser.error("metadata: --key is required with a handle")
+            rows.append({"handle": args.handle, "key": args.key, "value": args.value, "action": args.action})
+        # one job for each item, with all of its changes, so each item is read and written once;
+        # a row without a handle or key is kept in a job of its own, which fails when it runs
+        jobs = {}
+        invalid = []
+        for row in rows:
+            if not row.get("handle") or not row.get("key"):
+                invalid.append({"handle": row.get("handle"), "changes": [[row.get("action") or "set", row.get("key"), row.get("value")]]})
+                continue
+            job = jobs.setdefault(row["handle"], {"handle": row["handle"], "changes": []})
+            job["changes"].append([row.get("action") or "set", row["key"], row.get("value")])
+        return list(jobs.values()) + invalid
+
+
+def run_extent(dspace, job, workers, args):
+    if args.report:
+        if not os.path.isdir(args.report):
+            os.makedirs(args.report)
+        path = os.path.join(args.report, "{}.{}".format(job["handle"].replace("/", "_"), args.format))
+        report = dspace.extent_report(job["handle"], path, workers=workers)
+        return {"handle": job["handle"], "bytes": report.bytes, "size": report.as_dict()["size"], "report": path}
+    return {"handle": job["handle"], "size": dspace.get_handle_extent(job["handle"], workers=workers)}
+
+
+def run_export(dspace, job, workers, args):
+    return dict(dspace.export_handle(job["handle"], job["dest"], workers=workers), handle=job["handle"])
+
+
+def run_ingest(dspace, job, workers, args):
+    metadata = job.get("metadata") or []
+    if not isinstance(metadata, list):
+        metadata = json.loads(metadata)
+    for key, value in sorted(job.items()):
+        # CSV manifests can give metadata values as columns named by key, e.g. dc.title
+        if "." in key:
+            metadata.append({"key": key, "value": value})
+    entry = {"metadata": metadata, "files": _split(job.get("files")), "license": _truthy(job.get("license"))}
+    if job.get("item_uuid"):
+        entry["item_uuid"] = job["item_uuid"]
+    report = dspace.bulk_ingest(job["collection"], [entry], workers=workers)
+    result = report["items"][0]
+    if result["errors"]:
+        retry = None
+        if result["item_uuid"]:
+            retry_entry = report["retry"][0]
+            retry = {"item_uuid": result["item_uuid"], "files": retry_entry["files"], "license": retry_entry["license"]}
+        raise JobFailed("Ingest into item {} failed: {}".format(result["item_uuid"], json.dumps(result["errors"])), retry)
+    return dict(result, files=entry["files"])
+
+
+def run_metadata(dspace, job, workers, args):
+    if not job.get("handle"):
+        raise RuntimeError("A metadata job needs a handle")
+    for action, key, value in job["changes"]:
+        if not key:
+            raise RuntimeError("A metadata change to {} needs a key".format(job["handle"]))
+        if action not in ("set", "append", "remove"):
+            raise RuntimeError("Unknown metadata action {}".format(action))
+    item = dspace.get_handle(job["handle"], expand=())
+    if item.get("type") != "item":
+        raise RuntimeError("{} is not an item".format(job["handle"]))
+    record = dspace.get_item_metadata_record(item["uuid"])
+    for action, key, value in job["changes"]:
+        if action == "set":
+            record.set(key, value)
+        elif action == "append":
+            record.append(key, value)
+        else:
+            record.remove(key, value)
+    changes = record.diff()
+    if changes and not args.dry_run:
+        dspace.put_item_metadata_record(item["uuid"], record)
+    return {"handle": job["handle"], "uuid": item["uuid"], "changes": changes, "written": bool(changes) and not args.dry_run}
+
+
+def run_policy(dspace, job, workers, args):
+    policy = {"action": job.get("action") or "READ"}
+    if job.get("group_id"):
+        policy["groupId"] = job["group_id"]
+    elif job.get("group"):
+        policy["group"] = job["group"]
+    else:
+        raise RuntimeError("A policy job needs a group or group_id")
+    bundles = job.get("bundle")
+    if bundles is not None and not isinstance(bundles, list):
+        bundles = _split(bundles)
+    summary = dspace.apply_policy(job["handle"], policy, workers=workers, bundles=bundles, dry_run=args.dry_run)
+    return dict(summary, handle=job["handle"])
+
+
+OPERATIONS = {"extent": run_extent, "export": run_export, "ingest": run_ingest, "metadata": run_metadata, "policy": run_policy}
+
+
+def job_key(job):
+    return json.dumps(job, sort_keys=True)
+
+
+def load_checkpoint(path):
+    """
+    Returns dictionaries of the results of the finished jobs recorded in a checkpoint file, and of the retry fields of the failed ones, by job key."""
+
+    finished = {}
+    retries = {}
+    if path and os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    key = job_key(entry["job"])
+                    if "result" in entry:
+                        finished[key] = entry["result"]
+                    else:
+                        retries[key] = entry["retry"]
+    return finished, retries
+
+
+def connect(args, workers):
+    # imported here so that parsing arguments and --help do not wait for requests and the client
+    from .client import DAPPr
+
+    return DAPPr(args.base_url, args.email, args.password, instance_name=args.instance, max_workers=workers)
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    jobs = build_jobs(parser, args)
+    if not jobs:
+        parser.error("no jobs: give targets as arguments or in a --manifest")
+
+    finished, retries = load_checkpoint(args.checkpoint)
+    pending = [job for job in jobs if job_key(job) not in finished]
+    # a single job gets the whole pool for its own requests; many jobs run one request at a time each
+    workers = max(1, args.workers)
+    job_workers = workers if len(pending) == 1 else 1
+    operation = OPERATIONS[args.command]
+    dspace = connect(args, workers)
+
+    output = open(args.output, "a") if args.output else sys.stdout
+    checkpoint = open(args.checkpoint, "a") if args.checkpoint else None
+    failed = 0
+
+    def run(job):
+        try:
+            return job, operation(dspace, dict(job, **retries.get(job_key(job), {})), job_workers, args), None
+        except Exception as e:
+            return job, None, e
+
+    # results are written from this thread as jobs finish, so a checkpoint records every finished job however the run ends
+    executor = ThreadPoolExecutor(max_workers=workers)
+    futures = []
+    try:
+        if len(pending) < len(jobs):
+            sys.stderr.write("Skipping {} finished jobs recorded in {}\n".format(len(jobs) - len(pending), args.checkpoint))
+        futures = [executor.submit(run, job) for job in pending]
+        for future in as_completed(futures):
+            job, result, error = future.result()
+            if error is not None:
+                failed += 1
+                sys.stderr.write("Failed {}: {}\n".format(job_key(job), error))
+                if checkpoint is not None and getattr(error, "retry", None):
+                    checkpoint.write(json.dumps({"job": job, "retry": error.retry}) + "\n")
+                    checkpoint.flush()
+                continue
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+            if checkpoint is not None:
+                checkpoint.write(json.dumps({"job": job, "result": result}) + "\n")
+                checkpoint.flush()
+    except KeyboardInterrupt:
+        # jobs that have not started are dropped; running ones are left to finish but not recorded
+        for future in futures:
+            future.cancel()
+        sys.stderr.write("Interrupted; run the same command again to resume\n" if checkpoint else "Interrupted\n")
+        return 130
+    finally:
+        executor.shutdown(wait=False)
+        if checkpoint is not None:
+            checkpoint.close()
+        if output is not sys.stdout:
+            output.close()
+
+    sys.stderr.write("{} jobs finished, {} failed\n".format(len(pending) - failed, failed))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
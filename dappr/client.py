@@ -1,10 +1,30 @@
+import copy
+import email.utils
 import getpass
+import hashlib
 import humanize
+import json
+import logging
 import os
+import random
 import requests
 import sys
+import threading
+import time
 import urllib
 
+from requests.adapters import HTTPAdapter
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .cache import ObjectCache, ResponseCache, clock
+from .index import HierarchyIndex
+from .metadata import MetadataRecord
+from .objects import DSpaceObject, loads, unwrap, wrap
+from .report import ExtentReport
+from .upload import UploadStream
+
 if sys.version_info[:2] <= (2, 7):
     # Python 2
     get_input = raw_input
@@ -18,20 +38,52 @@ else:
 
 
 class DSpaceError(Exception):
-    pass
+    def __init__(self, message, status_code=None):
+        super(DSpaceError, self).__init__(message)
+        # the status of an unexpected response, or None for other errors
+        self.status_code = status_code
+
+
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+PURGE_ORDER = ("policies", "bitstreams", "items", "collections", "communities")
 
+replace_file = getattr(os, "replace", os.rename)
 
-class DAPPr(object):
+logger = logging.getLogger(__name__)
+
+
+def _missing_entries(expected, present):
     """
-    DSpace [REST] API Python Programming [Language] resource (DAPPr),
-    a client to communicate with a remote DSpace installation
-    using its backend API."""
+    Returns the MetadataEntry dictionaries of expected that are not in present, counting repeated values."""
+
+    counts = {}
+    for entry in present:
+        key = (entry["key"], entry["value"], entry.get("language") or None)
+        counts[key] = counts.get(key, 0) + 1
+    missing = []
+    for entry in expected:
+        key = (entry["key"], entry["value"], entry.get("language") or None)
+        if counts.get(key):
+            counts[key] -= 1
+        else:
+            missing.append(entry)
+    return missing
 
-    def __init__(self, base_url=None, email=None, password=None, instance_name=None):
+
+class _DAPPrBase(object):
+    """
+    Configuration and request policy shared by the DAPPr and AsyncDAPPr clients."""
+
+    def _configure(self, base_url, email, password, instance_name):
+        """
+        Sets the base URL and email of the DSpace instance, loading or adding a configured instance if they were not all supplied, and returns the password."""
+
+        self.groups = {}
         if base_url and email and password:
             self.base_url = base_url
             self.email = email
-            password = password
         else:
             self.config_file = os.path.join(os.path.expanduser("~"), ".dappr")
             configuration = self._load_config(instance_name)
@@ -41,7 +93,7 @@ class DAPPr(object):
             if not password:
                 password = getpass.getpass("Password: ")
             self._parse_groups(configuration)
-        self._login(password)
+        return password
 
     def _load_config(self, instance_name):
         config = configparser.RawConfigParser()
@@ -127,72 +179,387 @@ class DAPPr(object):
         self._save_config(config)
         return {key: value for (key, value) in config.items(instance_name)}
 
+    def _expand_param(self, expand):
+        if expand is None:
+            expand = self.expand
+        if not expand:
+            return None
+        if isinstance(expand, str):
+            return expand
+        return ",".join(sorted(expand))
+
+    def _retry_delay(self, retry, response=None):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return max(0, float(retry_after))
+            except ValueError:
+                retry_date = email.utils.parsedate_tz(retry_after)
+                if retry_date:
+                    return max(0, email.utils.mktime_tz(retry_date) - time.time())
+        return random.uniform(0, min(self.backoff_max, self.backoff_factor * 2 ** retry))
+
+
+class DAPPr(_DAPPrBase):
+    """
+    DSpace [REST] API Python Programming [Language] resource (DAPPr),
+    a client to communicate with a remote DSpace installation
+    using its backend API.
+
+    Once logged in, a DAPPr instance can be shared by the threads of a pool:
+    requests never modify the headers of the shared session."""
+
+    def __init__(self, base_url=None, email=None, password=None, instance_name=None, page_size=100, expand="all", max_workers=8,
+                 pool_connections=10, pool_maxsize=None, connect_timeout=10, read_timeout=300, keep_alive=True,
+                 max_retries=3, backoff_factor=0.5, backoff_max=60, cache_size=0, cache_ttl=300, response_cache_path=None,
+                 hooks=None, objects=False):
+        self.page_size = page_size
+        self.expand = expand
+        self.max_workers = max_workers
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize or max(10, max_workers)
+        self.timeout = (connect_timeout, read_timeout)
+        self.keep_alive = keep_alive
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self._login_lock = threading.Lock()
+        self.hooks = list(hooks or [])
+        self.objects = objects
+        self.cache = ObjectCache(cache_size, cache_ttl) if cache_size else None
+        self.response_cache = ResponseCache(response_cache_path) if response_cache_path else None
+        self._password = self._configure(base_url, email, password, instance_name)
+        self._login(self._password)
+
+    def _create_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if not self.keep_alive:
+            session.headers["Connection"] = "close"
+        return session
+
     def _login(self, password):
         url = self.base_url + "/rest/login"
         params = {"email": self.email, "password": password}
-        response = requests.post(url, params=params)
+        # logging in again after the session expired reuses the pooled session and its open connections
+        session = getattr(self, "session", None) or self._create_session()
+        response = self._send(session, "POST", url, 0, params=params)
         if response.status_code == 200:
-            self.session = requests.Session()
             token = response.cookies["JSESSIONID"]
-            self.session.cookies.update({"JSESSIONID": token})
+            session.cookies.set("JSESSIONID", token)
+            self._token = token
+            self.session = session
         else:
             raise DSpaceError("Error logging in - {}".format(response.text))
 
-    def _request(self, method, url, params={}, expected_response=200, data=None, json=None, json_expected=True):
-        response = method(url, params=params, data=data, json=json)
-        if response.status_code != expected_response:
-            raise DSpaceError("DSpace server responded with {}. Expected {}".format(response.status_code, expected_response))
+    def _session_expired(self, token):
+        """
+        Logs in again and returns True if the session sent with token is no longer authenticated."""
+
+        with self._login_lock:
+            if token != self._token:
+                # another thread has already logged in again
+                return True
+            response = self._send(self.session, "GET", self.base_url + "/rest/status", 0, headers={"Accept": "application/json"})
+            try:
+                if response.json().get("authenticated"):
+                    return False
+            except ValueError:
+                pass
+            self._login(self._password)
+            return True
+
+    def add_hook(self, hook):
+        """
+        Adds a hook called around every request. A hook is an object with any of the methods
+        before_send(method, url, attempt), after_response(method, url, response, seconds, attempt),
+        and on_error(method, url, error, seconds, attempt), where attempt counts from 0 for the
+        first try of a request and error is the exception raised by a request that got no response."""
+
+        self.hooks.append(hook)
+        return hook
+
+    def _call_hooks(self, name, *args):
+        for hook in self.hooks:
+            function = getattr(hook, name, None)
+            if function is not None:
+                function(*args)
+
+    def _send(self, session, method, url, attempt, **kwargs):
+        """
+        Sends one request with session, calling the hooks around it."""
+
+        if self.hooks:
+            self._call_hooks("before_send", method, url, attempt)
+        started = clock()
+        try:
+            response = session.request(method, url, timeout=self.timeout, **kwargs)
+        except requests.exceptions.RequestException as e:
+            if self.hooks:
+                self._call_hooks("on_error", method, url, e, clock() - started, attempt)
+            raise
+        if self.hooks:
+            self._call_hooks("after_response", method, url, response, clock() - started, attempt)
+        return response
+
+    def _request(self, method, url, params=None, expected_response=200, data=None, json=None, json_expected=True, headers=None, stream=False):
+        expected_responses = expected_response if isinstance(expected_response, (list, tuple)) else [expected_response]
+        idempotent = method in IDEMPOTENT_METHODS
+        position = data.tell() if hasattr(data, "seek") and hasattr(data, "tell") else None
+        retry = 0
+        attempt = 0
+        logged_in_again = False
+        while True:
+            if position is not None:
+                data.seek(position)
+            token = self._token
+            try:
+                response = self._send(self.session, method, url, attempt, params=params, data=data, json=json, headers=headers, stream=stream)
+            except requests.exceptions.RequestException as e:
+                attempt += 1
+                if not isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)) or not idempotent or retry >= self.max_retries:
+                    raise
+                time.sleep(self._retry_delay(retry))
+                retry += 1
+                continue
+            attempt += 1
+
+            if response.status_code in expected_responses:
+                break
+            response.close()
+            if response.status_code in (401, 403) and not logged_in_again and self._session_expired(token):
+                logged_in_again = True
+                continue
+            if idempotent and response.status_code in RETRY_STATUSES and retry < self.max_retries:
+                time.sleep(self._retry_delay(retry, response))
+                retry += 1
+                continue
+            raise DSpaceError("DSpace server responded with {}. Expected {}".format(response.status_code, expected_response), response.status_code)
 
         if json_expected:
             try:
-                response.json()
+                # kept on the response so that _json does not decode the body a second time
+                response._decoded = loads(response.content)
             except Exception:
                 raise DSpaceError("DSpace server responded with status {}, but returned a non-JSON document".format(response.status_code))
 
         return response
 
-    def _get(self, endpoint, params={}, expected_response=200, json_expected=True):
+    def _json(self, response):
+        """
+        Returns the decoded JSON body of a response, reusing the one decoded by _request to validate it. Each call after the first decodes the body again, so callers are free to modify what they are given."""
+
+        data = response.__dict__.pop("_decoded", None)
+        return loads(response.content) if data is None else data
+
+    def _get(self, endpoint, params=None, expected_response=200, json_expected=True, expand=None):
         url = self.base_url + endpoint
-        params["expand"] = "all"
-        params["limit"] = 1000000
-        response = self._request(self.session.get, url, params=params, expected_response=expected_response, json_expected=json_expected)
+        params = dict(params) if params else {}
+        expand = self._expand_param(expand)
+        if expand:
+            params["expand"] = expand
+        params.setdefault("limit", 1000000)
+        if self.response_cache is not None and json_expected and expected_response == 200:
+            return self._get_revalidated(url, params)
+        response = self._request("GET", url, params=params, expected_response=expected_response, json_expected=json_expected)
+        return response
+
+    def _cached_response(self, url, body):
+        response = requests.models.Response()
+        response.status_code = 200
+        response.url = url
+        response.encoding = "utf-8"
+        response.headers["Content-Type"] = "application/json"
+        response._content = body
+        return response
+
+    def _store_response(self, key, response, params):
+        """
+        Saves a response in the response cache if it can be revalidated later, either by
+        its ETag or Last-Modified headers or by the lastModified of the items it contains."""
+
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not (etag or last_modified) and "expand" in params:
+            data = response.__dict__.get("_decoded")
+            if data is None:
+                data = loads(response.content)
+            objects = data if isinstance(data, list) else [data]
+            if not all(isinstance(obj, dict) and obj.get("lastModified") for obj in objects):
+                return response
+        elif not (etag or last_modified):
+            return response
+        self.response_cache.set(key, response.content, etag=etag, last_modified=last_modified)
         return response
 
-    def _post_json(self, endpoint, params={}, expected_response=200, json_expected=True, json=None):
+    def _get_revalidated(self, url, params):
+        """
+        GETs a JSON document through the persistent response cache. A cached document is
+        revalidated with a conditional request when it was stored with an ETag or
+        Last-Modified header. Otherwise, the same endpoint is fetched without expand and
+        compared by lastModified: a cached item is reused if unchanged, and a cached page
+        of items is rebuilt from its unchanged items and fresh copies of the changed ones."""
+
+        key = requests.Request("GET", url, params=sorted(params.items())).prepare().url
+        cached = self.response_cache.get(key)
+        if cached is None:
+            self.response_cache.record(False)
+            response = self._request("GET", url, params=params)
+            return self._store_response(key, response, params)
+
+        if cached["etag"] or cached["last_modified"]:
+            headers = {}
+            if cached["etag"]:
+                headers["If-None-Match"] = cached["etag"]
+            if cached["last_modified"]:
+                headers["If-Modified-Since"] = cached["last_modified"]
+            response = self._request("GET", url, params=params, expected_response=[200, 304], headers=headers, json_expected=False)
+            self.response_cache.record(response.status_code == 304)
+            if response.status_code == 304:
+                return self._cached_response(url, cached["body"])
+            try:
+                response._decoded = loads(response.content)
+            except ValueError:
+                raise DSpaceError("DSpace server responded with status {}, but returned a non-JSON document".format(response.status_code))
+            return self._store_response(key, response, params)
+
+        probe_params = dict(params)
+        expand = probe_params.pop("expand")
+        current = self._json(self._request("GET", url, params=probe_params))
+        cached_data = json.loads(cached["body"].decode("utf-8"))
+        if isinstance(current, dict):
+            if isinstance(cached_data, dict) and current.get("lastModified") == cached_data.get("lastModified"):
+                self.response_cache.record(True)
+                return self._cached_response(url, cached["body"])
+            self.response_cache.record(False)
+            response = self._request("GET", url, params=params)
+            return self._store_response(key, response, params)
+
+        cached_items = {}
+        if isinstance(cached_data, list):
+            cached_items = {obj.get("uuid"): obj for obj in cached_data}
+        page = []
+        changed = False
+        for obj in current:
+            cached_obj = cached_items.get(obj.get("uuid"))
+            if cached_obj is not None and cached_obj.get("lastModified") == obj.get("lastModified"):
+                page.append(cached_obj)
+            elif obj.get("type") == "item":
+                page.append(self._json(self._get("/rest/items/{}".format(obj["uuid"]), expand=expand)))
+                changed = True
+            else:
+                self.response_cache.record(False)
+                response = self._request("GET", url, params=params)
+                return self._store_response(key, response, params)
+        self.response_cache.record(not changed)
+        body = json.dumps(page).encode("utf-8")
+        self.response_cache.set(key, body)
+        return self._cached_response(url, body)
+
+    def _get_object(self, kind, identifier, endpoint, expand=None):
+        """
+        Returns the JSON of a single object, from the object cache when the client has one."""
+
+        expand = self._expand_param(expand) or ()
+        if self.cache is None:
+            return self._wrap(self._json(self._get(endpoint, expand=expand)))
+        key = (kind, identifier, expand)
+        obj = self.cache.get(key)
+        if obj is None:
+            obj = self._json(self._get(endpoint, expand=expand))
+            uuids = [identifier] if kind == "item_metadata" else None
+            self.cache.set(key, obj, uuids)
+        # callers are free to modify what they are given, so never hand out the cached copy itself
+        return self._wrap(copy.deepcopy(obj))
+
+    def _wrap(self, data):
+        """
+        Returns JSON as Community, Collection, Item, and Bitstream objects if the client was created with objects=True."""
+
+        return wrap(data) if self.objects else data
+
+    def _invalidate(self, *uuids):
+        if self.cache is not None:
+            self.cache.invalidate(*uuids)
+
+    def _get_pages(self, endpoint, params=None, page_size=None, expand=None, offset=0):
+        """
+        Yields the objects of a list endpoint one at a time, requesting them page_size at a time with offset/limit until a page comes back empty."""
+
+        page_size = page_size or self.page_size
+        while True:
+            page_params = dict(params) if params else {}
+            page_params["limit"] = page_size
+            page_params["offset"] = offset
+            page = self._json(self._get(endpoint, params=page_params, expand=expand))
+            for obj in page:
+                yield self._wrap(obj)
+            # DSpace filters out the objects the user cannot see after taking the page, so only an empty page is the end
+            if not page:
+                break
+            offset += page_size
+
+    def _imap(self, function, iterable, workers=None):
+        """
+        Lazily applies function to every element of iterable on a pool of at most workers threads, yielding the results in order.
+        At most twice as many calls as workers are in flight, so iterable can be a stream of any length."""
+
+        workers = workers or self.max_workers
+        if workers <= 1:
+            for element in iterable:
+                yield function(element)
+            return
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for element in iterable:
+                pending.append(executor.submit(function, element))
+                if len(pending) >= workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def _map(self, function, iterable, workers=None):
+        """
+        Applies function to every element of iterable on a pool of at most workers threads, returning the results in order."""
+
+        return list(self._imap(function, iterable, workers))
+
+    # write requests send their headers with the request rather than setting them on the shared session,
+    # so that concurrent requests from several threads cannot see or remove each other's headers
+    def _post_json(self, endpoint, params=None, expected_response=200, json_expected=True, json=None):
         url = self.base_url + endpoint
-        self.session.headers.update({"Accept": "application/json"})
-        response = self._request(self.session.post, url, params=params, json=json, expected_response=expected_response, json_expected=json_expected)
+        headers = {"Accept": "application/json"}
+        response = self._request("POST", url, params=params, json=unwrap(json), expected_response=expected_response, json_expected=json_expected, headers=headers)
         return response
 
-    def _post_data(self, endpoint, params={}, expected_response=200, json_expected=True, data=None):
+    def _post_data(self, endpoint, params=None, expected_response=200, json_expected=True, data=None):
         url = self.base_url + endpoint
-        self.session.headers.update({"Accept": "application/json"})
-        response = self._request(self.session.post, url, data=data, expected_response=expected_response, json_expected=json_expected)
+        headers = {"Accept": "application/json"}
+        response = self._request("POST", url, params=params, data=data, expected_response=expected_response, json_expected=json_expected, headers=headers)
         return response
 
-    def _post_big_data(self, endpoint, params={}, expected_response=200, json_expected=True, data=None, path=None):
+    def _post_big_data(self, endpoint, params=None, expected_response=200, json_expected=True, data=None, path=None, method="POST"):
         url = self.base_url + endpoint
-        self.session.headers.update({
-                                    "Accept": "application/json",
-                                    "Content-Type": "multipart/form-data",
-                                    "Content-Disposition": "attachment; filename=%s" % quote(os.path.basename(path))
-                                    })
-        
-        response = self._request(self.session.post, url, data=data, expected_response=expected_response, json_expected=json_expected)
-        del self.session.headers["Content-Type"]
-        del self.session.headers["Content-Disposition"]
+        headers = {
+            "Accept": "application/json",
+            "Content-Type": "multipart/form-data",
+            "Content-Disposition": "attachment; filename=%s" % quote(os.path.basename(path))
+        }
+        response = self._request(method, url, params=params, data=data, expected_response=expected_response, json_expected=json_expected, headers=headers)
         return response
 
     def _put(self, endpoint, json=None, expected_response=200, json_expected=False):
         url = self.base_url + endpoint
-        self.session.headers.update({"Accept": "application/json"})
-        response = self._request(self.session.put, url, json=json, expected_response=expected_response, json_expected=json_expected)
+        headers = {"Accept": "application/json"}
+        response = self._request("PUT", url, json=unwrap(json), expected_response=expected_response, json_expected=json_expected, headers=headers)
         return response
 
-    def _delete(self, endpoint, expected_response=200, json_expected=True):
+    def _delete(self, endpoint, expected_response=200, json_expected=False):
         url = self.base_url + endpoint
-        self.session.headers.update({"Accept": "application/json"})
-        response = self._request(self.session.delete, url, expected_response=expected_response, json_expected=json_expected)
+        headers = {"Accept": "application/json"}
+        response = self._request("DELETE", url, expected_response=expected_response, json_expected=json_expected, headers=headers)
         return response
 
     # public functions
@@ -201,45 +568,64 @@ class DAPPr(object):
         self._post_json(endpoint, json_expected=False)
 
     # communities
-    def get_communities(self):
+    def iter_communities(self, page_size=None, expand=None):
         """
-        Returns array of all communities in DSpace."""
+        Yields all communities in DSpace, one page at a time."""
 
         endpoint = "/rest/communities"
-        response = self._get(endpoint)
-        return response.json()
+        return self._get_pages(endpoint, page_size=page_size, expand=expand)
 
-    def get_top_communities(self):
+    def get_communities(self, expand=None):
         """
-        Returns array of all top communities in DSpace."""
+        Returns array of all communities in DSpace."""
+
+        return list(self.iter_communities(expand=expand))
+
+    def iter_top_communities(self, page_size=None, expand=None):
+        """
+        Yields all top communities in DSpace, one page at a time."""
 
         endpoint = "/rest/communities/top-communities"
-        response = self._get(endpoint)
-        return response.json()
+        return self._get_pages(endpoint, page_size=page_size, expand=expand)
 
-    def get_community(self, community_uuid):
+    def get_top_communities(self, expand=None):
+        """
+        Returns array of all top communities in DSpace."""
+
+        return list(self.iter_top_communities(expand=expand))
+
+    def get_community(self, community_uuid, expand=None):
         """
         Returns community."""
 
         endpoint = "/rest/communities/{}".format(community_uuid)
-        response = self._get(endpoint)
-        return response.json()
+        return self._get_object("community", community_uuid, endpoint, expand=expand)
 
-    def get_community_collections(self, community_uuid):
+    def iter_community_collections(self, community_uuid, page_size=None, expand=None):
         """
-        Returns array of collections of community."""
+        Yields collections of community, one page at a time."""
 
         endpoint = "/rest/communities/{}/collections".format(community_uuid)
-        response = self._get(endpoint)
-        return response.json()
+        return self._get_pages(endpoint, page_size=page_size, expand=expand)
 
-    def get_community_subcommunities(self, community_uuid):
+    def get_community_collections(self, community_uuid, expand=None):
         """
-        Returns array of subcommunities of community."""
+        Returns array of collections of community."""
+
+        return list(self.iter_community_collections(community_uuid, expand=expand))
+
+    def iter_community_subcommunities(self, community_uuid, page_size=None, expand=None):
+        """
+        Yields subcommunities of community, one page at a time."""
 
         endpoint = "/rest/communities/{}/communities".format(community_uuid)
-        response = self._get(endpoint)
-        return response.json()
+        return self._get_pages(endpoint, page_size=page_size, expand=expand)
+
+    def get_community_subcommunities(self, community_uuid, expand=None):
+        """
+        Returns array of subcommunities of community."""
+
+        return list(self.iter_community_subcommunities(community_uuid, expand=expand))
 
     def post_community(self, community_dictionary):
         """
@@ -247,7 +633,7 @@ class DAPPr(object):
 
         endpoint = "/rest/communities/"
         response = self._post_json(endpoint, json=community_dictionary)
-        return response.json()
+        return self._wrap(self._json(response))
 
     def post_community_collection(self, community_uuid, collection_dictionary):
         """
@@ -255,7 +641,8 @@ class DAPPr(object):
 
         endpoint = "/rest/communities/{}/collections".format(community_uuid)
         response = self._post_json(endpoint, json=collection_dictionary)
-        return response.json()
+        self._invalidate(community_uuid)
+        return self._wrap(self._json(response))
 
     def post_community_subcommunity(self, community_uuid, community_dictionary):
         """
@@ -263,7 +650,8 @@ class DAPPr(object):
 
         endpoint = "/rest/communities/{}/communities".format(community_uuid)
         response = self._post_json(endpoint, json=community_dictionary)
-        return response.json()
+        self._invalidate(community_uuid)
+        return self._wrap(self._json(response))
 
     def put_community(self, community_uuid, community_dictionary):
         """
@@ -271,6 +659,7 @@ class DAPPr(object):
 
         endpoint = "/rest/communities/{}".format(community_uuid)
         response = self._put(endpoint, json=community_dictionary)
+        self._invalidate(community_uuid)
         return response
 
     def delete_community(self, community_uuid):
@@ -279,6 +668,7 @@ class DAPPr(object):
 
         endpoint = "/rest/communities/{}".format(community_uuid)
         response = self._delete(endpoint)
+        self._invalidate(community_uuid)
 
         return response
 
@@ -288,6 +678,7 @@ class DAPPr(object):
 
         endpoint = "/rest/communities/{}/collections/{}".format(community_uuid, collection_uuid)
         response = self._delete(endpoint)
+        self._invalidate(community_uuid, collection_uuid)
         return response
 
     def delete_community_subcommunity(self, community_uuid, subcommunity_uuid):
@@ -296,32 +687,42 @@ class DAPPr(object):
 
         endpoint = "/rest/communities/{}/communities/{}".format(community_uuid, subcommunity_uuid)
         response = self._delete(endpoint)
+        self._invalidate(community_uuid, subcommunity_uuid)
         return response
 
     # collections
-    def get_collections(self):
+    def iter_collections(self, page_size=None, expand=None):
         """
-        Returns array of collections of community."""
+        Yields all collections in DSpace, one page at a time."""
 
         endpoint = "/rest/collections"
-        response = self._get(endpoint)
-        return response.json()
+        return self._get_pages(endpoint, page_size=page_size, expand=expand)
+
+    def get_collections(self, expand=None):
+        """
+        Returns array of collections of community."""
 
-    def get_collection(self, collection_uuid):
+        return list(self.iter_collections(expand=expand))
+
+    def get_collection(self, collection_uuid, expand=None):
         """
         Return collection with id."""
 
         endpoint = "/rest/collections/{}".format(collection_uuid)
-        response = self._get(endpoint)
-        return response.json()
+        return self._get_object("collection", collection_uuid, endpoint, expand=expand)
 
-    def get_collection_items(self, collection_uuid):
+    def iter_collection_items(self, collection_uuid, page_size=None, expand=None):
         """
-        Return all items of collection."""
+        Yield all items of collection, one page at a time."""
 
         endpoint = "/rest/collections/{}/items".format(collection_uuid)
-        response = self._get(endpoint)
-        return response.json()
+        return self._get_pages(endpoint, page_size=page_size, expand=expand)
+
+    def get_collection_items(self, collection_uuid, expand=None):
+        """
+        Return all items of collection."""
+
+        return list(self.iter_collection_items(collection_uuid, expand=expand))
 
     def post_collection_item(self, collection_uuid, item_dictionary):
         """
@@ -329,7 +730,8 @@ class DAPPr(object):
 
         endpoint = "/rest/collections/{}/items".format(collection_uuid)
         response = self._post_json(endpoint, json=item_dictionary)     
-        return response.json()
+        self._invalidate(collection_uuid)
+        return self._wrap(self._json(response))
 
     # TO-DO: Find collection by passed name.
 
@@ -339,6 +741,7 @@ class DAPPr(object):
 
         endpoint = "/rest/collections/{}".format(collection_uuid)
         response = self._put(endpoint, json=collection_dictionary)
+        self._invalidate(collection_uuid)
         return response
 
     def delete_collection(self, collection_uuid):
@@ -347,6 +750,7 @@ class DAPPr(object):
 
         endpoint = "/rest/collections/{}".format(collection_uuid)
         response = self._delete(endpoint)
+        self._invalidate(collection_uuid)
         return response
 
     def delete_collection_item(self, collection_uuid, item_uuid):
@@ -355,40 +759,55 @@ class DAPPr(object):
 
         endpoint = "/rest/collections/{}/items/{}".format(collection_uuid, item_uuid)
         response = self._delete(endpoint)
+        self._invalidate(collection_uuid, item_uuid)
         return response
 
     # items
-    def get_items(self):
+    def iter_items(self, page_size=None, expand=None):
         """
-        Return list of items."""
+        Yield all items, one page at a time."""
 
         endpoint = "/rest/items"
-        response = self._get(endpoint)
-        return response.json()
+        return self._get_pages(endpoint, page_size=page_size, expand=expand)
+
+    def get_items(self, expand=None):
+        """
+        Return list of items."""
+
+        return list(self.iter_items(expand=expand))
 
-    def get_item(self, item_uuid):
+    def get_item(self, item_uuid, expand=None):
         """
         Return item."""
 
         endpoint = "/rest/items/{}".format(item_uuid)
-        response = self._get(endpoint)
-        return response.json()
+        return self._get_object("item", item_uuid, endpoint, expand=expand)
 
     def get_item_metadata(self, item_uuid):
         """
         Return item metadata."""
 
         endpoint = "/rest/items/{}/metadata".format(item_uuid)
-        response = self._get(endpoint)
-        return response.json()
+        return self._get_object("item_metadata", item_uuid, endpoint, expand=())
 
-    def get_item_bitstreams(self, item_uuid):
+    def get_item_metadata_record(self, item_uuid):
         """
-        Return item bitstreams."""
+        Return item metadata as a MetadataRecord."""
+
+        return MetadataRecord(self.get_item_metadata(item_uuid))
+
+    def iter_item_bitstreams(self, item_uuid, page_size=None, expand=None):
+        """
+        Yield item bitstreams, one page at a time."""
 
         endpoint = "/rest/items/{}/bitstreams".format(item_uuid)
-        response = self._get(endpoint)
-        return response.json()
+        return self._get_pages(endpoint, page_size=page_size, expand=expand)
+
+    def get_item_bitstreams(self, item_uuid, expand=None):
+        """
+        Return item bitstreams."""
+
+        return list(self.iter_item_bitstreams(item_uuid, expand=expand))
 
     # TO-DO: Find items by metadata entry. You must post a MetadataEntry.
 
@@ -398,16 +817,41 @@ class DAPPr(object):
 
         endpoint = "/rest/items/{}/metadata".format(item_uuid)
         response = self._post_json(endpoint, json=metadata_list, json_expected=False)
+        self._invalidate(item_uuid)
         return response
 
-    def post_item_bitstream(self, item_uuid, bitstream_path):
+    def _verify_upload(self, bitstream, data):
+        """
+        Raises a DSpaceError if the checkSum DSpace computed for an uploaded bitstream does not match the digest of the uploaded file."""
+
+        checksum = bitstream.get("checkSum") or {}
+        if not checksum.get("value"):
+            return
+        algorithm = checksum.get("checkSumAlgorithm", "MD5").lower()
+        if algorithm == data.algorithm:
+            digest = data.hexdigest()
+        else:
+            # the server uses an algorithm other than the one computed while uploading, so read the file again
+            file_digest = hashlib.new(algorithm)
+            with open(data.path, "rb") as f:
+                for chunk in iter(lambda: f.read(data.chunk_size), b""):
+                    file_digest.update(chunk)
+            digest = file_digest.hexdigest()
+        if digest != checksum["value"].lower():
+            raise DSpaceError("Checksum of {} uploaded as bitstream {} does not match: {} {} locally, {} in DSpace".format(data.path, bitstream.get("uuid"), checksum.get("checkSumAlgorithm"), digest, checksum["value"]))
+
+    def post_item_bitstream(self, item_uuid, bitstream_path, chunk_size=1024 * 1024, progress=None, verify_checksum=True):
         """
         Add bitstream to item. You must post a Bitstream"""
 
         endpoint = "/rest/items/{}/bitstreams".format(item_uuid)
-        with open(bitstream_path, "rb") as f:
-            response = self._post_big_data(endpoint, data=f, path=bitstream_path)
-        return response.json()
+        with UploadStream(bitstream_path, chunk_size=chunk_size, progress=progress) as data:
+            response = self._post_big_data(endpoint, data=data, path=bitstream_path)
+        self._invalidate(item_uuid)
+        bitstream = self._json(response)
+        if verify_checksum:
+            self._verify_upload(bitstream, data)
+        return self._wrap(bitstream)
 
     def put_item_metadata(self, item_uuid, metadata_list):
         """
@@ -415,14 +859,54 @@ class DAPPr(object):
 
         endpoint = "/rest/items/{}/metadata".format(item_uuid)
         response = self._put(endpoint, json=metadata_list, json_expected=False)        
+        self._invalidate(item_uuid)
         return response
 
+    def put_item_metadata_record(self, item_uuid, record):
+        """
+        Update metadata in item from a MetadataRecord, sending only the keys that have been changed. Returns None for an unchanged record.
+        If every value of a key was removed, the item's metadata is cleared and the entries DSpace did not keep are posted again, and are missing in DSpace until the POST succeeds. The POST is retried, but if it still fails, record.to_list() holds the metadata to post again."""
+
+        keys = record.changed_keys()
+        if not keys:
+            return None
+        if all(key in record for key in keys):
+            # DSpace replaces the values of the keys in a PUT and keeps those of other keys
+            response = self.put_item_metadata(item_uuid, record.to_list(keys))
+        else:
+            # a PUT cannot remove every value of a key, so the metadata is cleared and posted again
+            self.delete_item_metadata(item_uuid)
+            response = self._repost_item_metadata(item_uuid, record.to_list())
+        record.mark_clean()
+        return response
+
+    def _repost_item_metadata(self, item_uuid, metadata_list):
+        """
+        Posts the metadata of an item whose metadata has just been cleared, retrying a failed POST, since until it succeeds the item is missing metadata.
+        DSpace 6 keeps some fields when clearing metadata (e.g. dc.date.accessioned and dc.identifier.uri), and a POST may be applied although its response was lost,
+        so the metadata is read back before each attempt and only the entries that are not already there are posted."""
+
+        retry = 0
+        while True:
+            try:
+                self._invalidate(item_uuid)
+                missing = _missing_entries(metadata_list, self.get_item_metadata(item_uuid))
+                if not missing:
+                    return None
+                return self.post_item_metadata(item_uuid, missing)
+            except (DSpaceError, requests.exceptions.RequestException):
+                if retry >= self.max_retries:
+                    raise
+            time.sleep(self._retry_delay(retry))
+            retry += 1
+
     def delete_item(self, item_uuid):
         """
         Delete item."""
 
         endpoint = "/rest/items/{}".format(item_uuid)
         response = self._delete(endpoint)
+        self._invalidate(item_uuid)
         return response
 
     def delete_item_metadata(self, item_uuid):
@@ -431,60 +915,132 @@ class DAPPr(object):
 
         endpoint = "/rest/items/{}/metadata".format(item_uuid)
         response = self._delete(endpoint, json_expected=False)
+        self._invalidate(item_uuid)
         return response
 
     def delete_item_bitstream(self, item_uuid, bitstream_uuid):
         """
         Delete item bitstream."""
 
-        endpoint = "/rest/items/{}/bitstreams/{}".format(bitstream_uuid)
+        endpoint = "/rest/items/{}/bitstreams/{}".format(item_uuid, bitstream_uuid)
         response = self._delete(endpoint)
+        self._invalidate(item_uuid, bitstream_uuid)
         return response
 
     # bitstreams
-    def get_bitstreams(self):
+    def iter_bitstreams(self, page_size=None, expand=None):
         """
-        Return all bitstreams in DSpace."""
+        Yield all bitstreams in DSpace, one page at a time."""
 
         endpoint = "/rest/bitstreams"
-        response = self._get(endpoint)
-        return response.json()
+        return self._get_pages(endpoint, page_size=page_size, expand=expand)
 
-    def get_bitstream(self, bitstream_uuid):
+    def get_bitstreams(self, expand=None):
+        """
+        Return all bitstreams in DSpace."""
+
+        return list(self.iter_bitstreams(expand=expand))
+
+    def get_bitstream(self, bitstream_uuid, expand=None):
         """
         Return bitstream."""
 
         endpoint = "/rest/bitstreams/{}".format(bitstream_uuid)
-        response = self._get(endpoint)
-        return response.json()
+        return self._get_object("bitstream", bitstream_uuid, endpoint, expand=expand)
 
     def get_bitstream_policy(self, bitstream_uuid):
         """
         Return bitstream policies."""
 
         endpoint = "/rest/bitstreams/{}/policy".format(bitstream_uuid)
-        response = self._get(endpoint)
-        return response.json()
+        response = self._get(endpoint, expand=())
+        return self._json(response)
 
     def get_bitstream_data(self, bitstream_uuid):
         """
         Return data of bitstream."""
 
         endpoint = "/rest/bitstreams/{}/retrieve".format(bitstream_uuid)
-        response = self._get(endpoint)
+        response = self._get(endpoint, expand=(), json_expected=False)
         return response
 
+    def download_bitstream(self, bitstream_uuid, dest_path, chunk_size=1024 * 1024, verify_checksum=True, resume=True):
+        """
+        Stream data of bitstream to dest_path in chunks of chunk_size bytes, resuming a partial download where the server supports it."""
+
+        bitstream = self.get_bitstream(bitstream_uuid, expand=())
+        return self._download_bitstream(bitstream, dest_path, chunk_size=chunk_size, verify_checksum=verify_checksum, resume=resume)
+
+    def _download_bitstream(self, bitstream, dest_path, chunk_size=1024 * 1024, verify_checksum=True, resume=True):
+        bitstream_uuid = bitstream["uuid"]
+        checksum = bitstream.get("checkSum") or {}
+        digest = None
+        if verify_checksum and checksum.get("value"):
+            digest = hashlib.new(checksum.get("checkSumAlgorithm", "MD5").lower())
+
+        partial_path = dest_path + ".part"
+        offset = 0
+        if resume and os.path.exists(partial_path):
+            offset = os.path.getsize(partial_path)
+            if offset > bitstream.get("sizeBytes", offset):
+                offset = 0
+
+        if offset and offset == bitstream.get("sizeBytes"):
+            mode = "ab"
+            response = None
+        else:
+            url = self.base_url + "/rest/bitstreams/{}/retrieve".format(bitstream_uuid)
+            headers = {"Range": "bytes={}-".format(offset)} if offset else None
+            response = self._request("GET", url, expected_response=[200, 206], json_expected=False, headers=headers, stream=True)
+            # a 200 means the server ignored the Range header and is sending the whole bitstream
+            mode = "ab" if response.status_code == 206 else "wb"
+
+        try:
+            with open(partial_path, mode) as f:
+                if mode == "ab" and digest:
+                    with open(partial_path, "rb") as partial:
+                        for chunk in iter(lambda: partial.read(chunk_size), b""):
+                            digest.update(chunk)
+                if response is not None:
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        f.write(chunk)
+                        if digest:
+                            digest.update(chunk)
+        finally:
+            if response is not None:
+                response.close()
+
+        if digest and digest.hexdigest() != checksum["value"].lower():
+            os.remove(partial_path)
+            raise DSpaceError("Checksum of {} does not match {} {} of bitstream {}".format(dest_path, checksum.get("checkSumAlgorithm"), checksum["value"], bitstream_uuid))
+
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        os.rename(partial_path, dest_path)
+        return dest_path
+
     def put_bitstream_policy(self, bitstream_uuid, policy_list):
         """
         Add policy to item. You must post a ResourcePolicy"""
 
         endpoint = "/rest/bitstreams/{}".format(bitstream_uuid)
-        bitstream = self._get(endpoint).json()
+        bitstream = self._json(self._get(endpoint, expand=()))
         bitstream["policies"] = policy_list
         response = self._put(endpoint, json=bitstream, json_expected=False)
+        self._invalidate(bitstream_uuid)
         return response
 
-    # TO-DO: Update data/file of bitstream. You must put the data
+    def put_bitstream_data(self, bitstream_uuid, bitstream_path, chunk_size=1024 * 1024, progress=None, verify_checksum=True):
+        """
+        Update data/file of bitstream. You must put the data"""
+
+        endpoint = "/rest/bitstreams/{}/data".format(bitstream_uuid)
+        with UploadStream(bitstream_path, chunk_size=chunk_size, progress=progress) as data:
+            response = self._post_big_data(endpoint, data=data, path=bitstream_path, json_expected=False, method="PUT")
+        self._invalidate(bitstream_uuid)
+        if verify_checksum:
+            self._verify_upload(self.get_bitstream(bitstream_uuid, expand=()), data)
+        return response
 
     def put_bitstream(self, bitstream_uuid, bitstream):
         """
@@ -492,6 +1048,7 @@ class DAPPr(object):
 
         endpoint = "/rest/bitstreams/{}".format(bitstream_uuid)
         response = self._put(endpoint, json=bitstream, json_expected=False)        
+        self._invalidate(bitstream_uuid)
         return response
 
     def delete_bitstream(self, bitstream_uuid):
@@ -500,6 +1057,7 @@ class DAPPr(object):
 
         endpoint = "/rest/bitstreams/{}".format(bitstream_uuid)
         response = self._delete(endpoint)
+        self._invalidate(bitstream_uuid)
         return response
 
     def delete_bitstream_policy(self, bitstream_uuid, policy_uuid):
@@ -508,16 +1066,406 @@ class DAPPr(object):
 
         endpoint = "/rest/bitstreams/{}/policy/{}".format(bitstream_uuid, policy_uuid)
         response = self._delete(endpoint)
+        self._invalidate(bitstream_uuid)
         return response
 
     # handle
-    def get_handle(self, handle):
+    def get_handle(self, handle, expand=None):
         """
         Returns a Community, Collection, or Item object that matches that handle."""
 
         endpoint = "/rest/handle/{}".format(handle)
-        response = self._get(endpoint)
-        return response.json()
+        return self._get_object("handle", handle, endpoint, expand=expand)
+
+    def _walk_container(self, container, expand, ancestors=()):
+        """
+        Yields (ancestors, item) for every item in a Collection or in all Collections of a Community and its Sub-Communities, at any depth."""
+
+        ancestors = ancestors + (container,)
+        if container.get("type") == "collection":
+            for item in self.iter_collection_items(container["uuid"], expand=expand):
+                yield ancestors, item
+        else:
+            for collection in self.iter_community_collections(container["uuid"], expand=()):
+                for result in self._walk_container(collection, expand, ancestors):
+                    yield result
+            for subcommunity in self.iter_community_subcommunities(container["uuid"], expand=()):
+                for result in self._walk_container(subcommunity, expand, ancestors):
+                    yield result
+
+    def _walk_handle(self, handle, expand=None):
+        obj = self.get_handle(handle, expand=expand)
+        if obj.get("type") == "item":
+            yield (), obj
+        else:
+            for result in self._walk_container(obj, expand):
+                yield result
+
+    def iter_handle_items(self, handle, expand=None):
+        """
+        Yields the Item that matches that handle, all Items in a Collection, or all Items in all Collections of a Community and its Sub-Communities."""
+
+        for _, item in self._walk_handle(handle, expand=expand):
+            yield item
+
+    def _walk_target(self, target, expand=None):
+        """
+        Walks the items under a handle, or under a Collection or Community object."""
+
+        if isinstance(target, (dict, DSpaceObject)):
+            return self._walk_container(target, expand)
+        return self._walk_handle(target, expand=expand)
+
+    def _remediate_item(self, task):
+        transform_fn, dry_run, item = task
+        record = MetadataRecord(item.get("metadata") or [])
+        transform_fn(record, item)
+        changes = record.diff()
+        if not changes:
+            return "unchanged", item, changes, None, None
+        if dry_run:
+            return "changed", item, changes, None, None
+        metadata = record.to_list()
+        try:
+            self.put_item_metadata_record(item["uuid"], record)
+            return "written", item, changes, None, None
+        except (DSpaceError, requests.exceptions.RequestException) as e:
+            return "failed", item, changes, metadata, e
+
+    def remediate(self, handle_or_collection, transform_fn, workers=None, dry_run=False):
+        """
+        Applies transform_fn(record, item) to the MetadataRecord of every Item under a handle, Collection, or Community, writing back only the keys of the Items whose metadata it changed, with at most workers requests in parallel.
+        With dry_run, nothing is written and the report shows what would change.
+
+        A transform that removes every value of a key is written by clearing the Item's metadata and posting it again (see put_item_metadata_record), which is not atomic: if the POST keeps failing, the Item is left without metadata.
+        Each failed Item in the report therefore carries the full "metadata" that was to be written, which can be restored with post_item_metadata."""
+
+        def tasks():
+            seen = set()
+            for _, item in self._walk_target(handle_or_collection, expand={"metadata"}):
+                # an Item mapped into several Collections under the target is transformed once
+                if item["uuid"] in seen:
+                    continue
+                seen.add(item["uuid"])
+                yield transform_fn, dry_run, item
+
+        report = {"scanned": 0, "unchanged": 0, "changed": 0, "written": 0, "failed": [], "diffs": []}
+        for status, item, changes, metadata, error in self._imap(self._remediate_item, tasks(), workers):
+            report["scanned"] += 1
+            if status == "unchanged":
+                report["unchanged"] += 1
+                continue
+            report["changed"] += 1
+            report["diffs"].append({"uuid": item["uuid"], "handle": item.get("handle"), "changes": changes})
+            if status == "written":
+                report["written"] += 1
+            elif status == "failed":
+                report["failed"].append({"uuid": item["uuid"], "handle": item.get("handle"), "error": str(error), "metadata": metadata})
+        return report
+
+    def _resolve_policy(self, policy):
+        """
+        Returns a copy of a ResourcePolicy, with the groupId of a group configured for this instance in place of its "group" short name."""
+
+        policy = dict(policy)
+        group = policy.pop("group", None)
+        if group is not None and policy.get("groupId") is None:
+            if group not in self.groups:
+                raise DSpaceError("No group named {} is configured for this instance".format(group))
+            policy["groupId"] = self.groups[group]["group_id"]
+        return policy
+
+    def _policy_key(self, policy):
+        def date(value):
+            return str(value)[:10] if value else None
+
+        return (str(policy.get("action") or "").upper(), str(policy.get("groupId")), policy.get("rpType") or None,
+                date(policy.get("startDate")), date(policy.get("endDate")))
+
+    def _apply_item_policy(self, task):
+        item, policies, bundles, dry_run = task
+        wanted = set(self._policy_key(policy) for policy in policies)
+        results = []
+        try:
+            bitstreams = list(self.iter_item_bitstreams(item["uuid"], expand={"policies"}))
+        except (DSpaceError, requests.exceptions.RequestException) as e:
+            return item, [], e
+        for bitstream in bitstreams:
+            if bundles is not None and bitstream.get("bundleName") not in bundles:
+                continue
+            if set(self._policy_key(policy) for policy in bitstream.get("policies") or []) == wanted:
+                results.append((bitstream, "skipped", None))
+                continue
+            if dry_run:
+                results.append((bitstream, "updated", None))
+                continue
+            try:
+                bitstream["policies"] = policies
+                self._put("/rest/bitstreams/{}".format(bitstream["uuid"]), json=bitstream, json_expected=False)
+                self._invalidate(bitstream["uuid"])
+                results.append((bitstream, "updated", None))
+            except (DSpaceError, requests.exceptions.RequestException) as e:
+                results.append((bitstream, "failed", e))
+        return item, results, None
+
+    def apply_policy(self, handle, policy_template, workers=None, bundles=None, dry_run=False):
+        """
+        Sets the ResourcePolicies of every Bitstream under an Item, Collection, or Community to policy_template, a ResourcePolicy or list of ResourcePolicies, with at most workers items in parallel.
+        Bitstreams that already carry equivalent policies (the same action, groupId, rpType, startDate and endDate) are skipped."""
+
+        if isinstance(policy_template, dict):
+            policy_template = [policy_template]
+        policies = [self._resolve_policy(policy) for policy in policy_template]
+        bundles = None if bundles is None else set(bundles)
+
+        def tasks():
+            for _, item in self._walk_target(handle, expand=()):
+                yield item, policies, bundles, dry_run
+
+        summary = {"items": 0, "bitstreams": 0, "updated": 0, "skipped": 0, "failed": []}
+        for item, results, error in self._imap(self._apply_item_policy, tasks(), workers):
+            summary["items"] += 1
+            if error is not None:
+                summary["failed"].append({"uuid": item["uuid"], "handle": item.get("handle"), "error": str(error)})
+            for bitstream, status, error in results:
+                summary["bitstreams"] += 1
+                if status == "failed":
+                    summary["failed"].append({"uuid": bitstream["uuid"], "item": item["uuid"], "error": str(error)})
+                else:
+                    summary[status] += 1
+        return summary
+
+    def _load_checkpoint(self, path):
+        if not os.path.exists(path):
+            return {"items": {}}
+        with open(path) as f:
+            checkpoint = json.load(f)
+        if "items" not in checkpoint:
+            # a checkpoint from before items were recorded with their lastModified: every known item is reported as modified once
+            checkpoint = {"items": dict((uuid, None) for uuid in checkpoint.get("uuids", []))}
+        return checkpoint
+
+    def _save_checkpoint(self, path, checkpoint):
+        partial_path = path + ".part"
+        with open(partial_path, "w") as f:
+            json.dump(checkpoint, f)
+        replace_file(partial_path, path)
+
+    def harvest(self, checkpoint_path, handle=None, expand=None, workers=None):
+        """
+        Yields ("created", item), ("modified", item), or ("deleted", {"uuid": uuid}) for each Item created, modified, or deleted since the last harvest recorded in checkpoint_path, or every Item as created on the first harvest.
+        The checkpoint records the lastModified of every Item, and an Item is modified when its lastModified differs, so an Item changed while a harvest is scanning is reported by the next one.
+        Items are scanned without expanded fields, and only created and modified Items are fetched with expand, at most workers at a time; an Item deleted before it is fetched is reported as deleted.
+        The checkpoint is only saved once the generator is exhausted, so an interrupted harvest is repeated in full."""
+
+        known = self._load_checkpoint(checkpoint_path)["items"]
+        versions = {}
+        gone = set()
+        collections = set()
+
+        def scan():
+            if handle is None:
+                for item in self.iter_items(expand=()):
+                    yield item
+                return
+            for ancestors, item in self._walk_target(handle, expand=()):
+                collections.update(obj["uuid"] for obj in ancestors if obj.get("type") == "collection")
+                yield item
+
+        def changes():
+            for item in scan():
+                uuid = item["uuid"]
+                if uuid in versions:
+                    continue
+                last_modified = item.get("lastModified")
+                versions[uuid] = last_modified
+                if uuid not in known:
+                    yield "created", uuid
+                elif not last_modified or known[uuid] != last_modified:
+                    yield "modified", uuid
+
+        def fetch(change):
+            status, uuid = change
+            try:
+                return status, uuid, self.get_item(uuid, expand=expand)
+            except DSpaceError as e:
+                if e.status_code != 404:
+                    raise
+                return "deleted", uuid, None
+
+        for status, uuid, item in self._imap(fetch, changes(), workers):
+            if status == "deleted":
+                # reported with the other deleted items below, if it was known
+                del versions[uuid]
+                gone.add(uuid)
+                continue
+            if item.get("lastModified"):
+                # the item may have changed again since it was scanned, and what was yielded is this version
+                versions[uuid] = item["lastModified"]
+            yield status, item
+
+        confirm_expand = expand
+        if handle is not None:
+            confirm_expand = set((self._expand_param(expand) or "").split(",")) - set([""])
+            if "all" not in confirm_expand:
+                confirm_expand |= set(["parentCollection", "parentCollectionList"])
+
+        def confirm(uuid):
+            # an item missing from the scan may only have been skipped, when an item deleted during the scan
+            # shifted the offset of the later pages, so it is only reported as deleted once it is gone
+            if uuid in gone:
+                return uuid, None
+            try:
+                item = self.get_item(uuid, expand=confirm_expand)
+            except DSpaceError as e:
+                if e.status_code != 404:
+                    raise
+                return uuid, None
+            if handle is not None:
+                parents = [item.get("parentCollection") or {}] + list(item.get("parentCollectionList") or [])
+                if not any(parent.get("uuid") in collections for parent in parents):
+                    # moved out of the harvested Collection or Community
+                    return uuid, None
+            return uuid, item
+
+        for uuid, item in self._imap(confirm, sorted(set(known) - set(versions)), workers):
+            if item is None:
+                yield "deleted", {"uuid": uuid}
+                continue
+            versions[uuid] = item.get("lastModified")
+            if not item.get("lastModified") or item["lastModified"] != known[uuid]:
+                yield "modified", item
+        self._save_checkpoint(checkpoint_path, {"items": versions})
+
+    def _purge_targets(self, handle, what):
+        """
+        Yields (kind, uuid) for every object of the kinds in what under a handle, including the object itself, in the order they can be deleted in.
+        An Item listed in a Collection under the handle but owned by a Collection outside it is not deleted, nor are its bitstreams: purging items yields ("mappings", "<collection uuid>/<item uuid>") to unmap it instead."""
+
+        obj = self.get_handle(handle, expand={"collections", "subCommunities"})
+        containers = {"collections": [], "communities": []}
+        if obj.get("type") == "community":
+            for community in self._get_community_tree(obj, self.max_workers):
+                containers["communities"].append(community["uuid"])
+                containers["collections"].extend(collection["uuid"] for collection in community.get("collections") or [])
+        elif obj.get("type") == "collection":
+            containers["collections"].append(obj["uuid"])
+        scope = set(containers["collections"])
+
+        if "policies" in what or "bitstreams" in what or "items" in what:
+            expand = {"parentCollection"}
+            if "policies" in what or "bitstreams" in what:
+                expand.add("bitstreams")
+            items = []
+            mappings = []
+            seen = set()
+            for ancestors, item in self._walk_handle(handle, expand=expand):
+                owner = (item.get("parentCollection") or {}).get("uuid")
+                if ancestors and owner not in scope:
+                    # mapped into a Collection being purged from one outside it, so its data is not ours to delete
+                    if "items" in what:
+                        mappings.append("{}/{}".format(ancestors[-1]["uuid"], item["uuid"]))
+                    continue
+                if item["uuid"] in seen:
+                    continue
+                seen.add(item["uuid"])
+                if "items" in what:
+                    items.append(item["uuid"])
+                for bitstream in item.get("bitstreams") or []:
+                    yield "bitstreams" if "bitstreams" in what else "policies", bitstream["uuid"]
+            for mapping in mappings:
+                yield "mappings", mapping
+            for item_uuid in items:
+                yield "items", item_uuid
+        for collection_uuid in containers["collections"] if "collections" in what else []:
+            yield "collections", collection_uuid
+        # subcommunities before the communities that contain them
+        for community_uuid in reversed(containers["communities"]) if "communities" in what else []:
+            yield "communities", community_uuid
+
+    def _purge_object(self, task):
+        kind, uuid = task
+        endpoints = {"bitstreams": "/rest/bitstreams/{}", "items": "/rest/items/{}",
+                     "collections": "/rest/collections/{}", "communities": "/rest/communities/{}"}
+        try:
+            if kind == "policies":
+                for policy in self.get_bitstream_policy(uuid):
+                    self._delete("/rest/bitstreams/{}/policy/{}".format(uuid, policy["id"]), expected_response=[200, 404])
+            elif kind == "mappings":
+                collection_uuid, item_uuid = uuid.split("/")
+                self._delete("/rest/collections/{}/items/{}".format(collection_uuid, item_uuid), expected_response=[200, 404])
+                self._invalidate(collection_uuid, item_uuid)
+            else:
+                # an object that is already gone, e.g. deleted by an interrupted purge, counts as deleted
+                self._delete(endpoints[kind].format(uuid), expected_response=[200, 404])
+            self._invalidate(uuid)
+            return kind, uuid, None
+        except (DSpaceError, requests.exceptions.RequestException) as e:
+            return kind, uuid, e
+
+    def purge(self, handle, what=("bitstreams", "items"), workers=None, dry_run=True, journal=None):
+        """
+        Deletes the objects of the kinds in what ("policies", "bitstreams", "items", "collections", "communities", or "all") under an Item, Collection, or Community, including the object itself, with at most workers deletions in parallel.
+        Objects are listed before anything is deleted, and deleted one kind at a time: policies, then bitstreams, items, collections, and communities, subcommunities first.
+        Items owned by a Collection outside the handle that are only mapped into one under it are unmapped (as "mappings", before items are deleted) rather than deleted, and their bitstreams and policies are left alone.
+        By default nothing is deleted (dry_run). Each action is logged, and appended to the journal file if one is given; objects the journal records as deleted are skipped, so an interrupted purge can be run again with the same journal."""
+
+        what = PURGE_ORDER if what == "all" else ((what,) if isinstance(what, str) else tuple(what))
+        unknown = set(what) - set(PURGE_ORDER)
+        if unknown:
+            raise DSpaceError("Cannot purge {}".format(", ".join(sorted(unknown))))
+        if "bitstreams" in what:
+            # deleting a bitstream deletes its policies
+            what = tuple(kind for kind in what if kind != "policies")
+        order = [kind for kind in PURGE_ORDER if kind in what]
+        if "items" in what:
+            order.insert(order.index("items"), "mappings")
+
+        # the same uuid can be done as one kind and not another, e.g. a bitstream whose policies were deleted
+        done = set()
+        if journal and os.path.exists(journal):
+            with open(journal) as f:
+                for line in f:
+                    entry = json.loads(line)
+                    if entry.get("status") == "deleted":
+                        done.add((entry.get("kind"), entry["uuid"]))
+
+        phases = dict((kind, []) for kind in order)
+        skipped = 0
+        for kind, uuid in self._purge_targets(handle, what):
+            if (kind, uuid) in done:
+                skipped += 1
+                continue
+            phases[kind].append(uuid)
+
+        report = {"dry_run": dry_run, "planned": {}, "deleted": {}, "skipped": skipped, "failed": []}
+        journal_file = open(journal, "a") if journal and not dry_run else None
+        try:
+            for kind in order:
+                report["planned"][kind] = len(phases[kind])
+                report["deleted"][kind] = 0
+                if dry_run:
+                    for uuid in phases[kind]:
+                        logger.info("Would %s %s %s", "unmap" if kind == "mappings" else "delete", kind, uuid)
+                    continue
+                for _, uuid, error in self._imap(self._purge_object, [(kind, uuid) for uuid in phases[kind]], workers):
+                    if error is None:
+                        report["deleted"][kind] += 1
+                        logger.info("%s %s %s", "Unmapped" if kind == "mappings" else "Deleted", kind, uuid)
+                    else:
+                        report["failed"].append({"kind": kind, "uuid": uuid, "error": str(error)})
+                        logger.warning("Failed to %s %s %s: %s", "unmap" if kind == "mappings" else "delete", kind, uuid, error)
+                    if journal_file is not None:
+                        entry = {"kind": kind, "uuid": uuid, "status": "deleted" if error is None else "failed", "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+                        journal_file.write(json.dumps(entry) + "\n")
+                        journal_file.flush()
+                if any(failure["kind"] == kind for failure in report["failed"]):
+                    # the objects containing those that could not be deleted are left alone
+                    break
+        finally:
+            if journal_file is not None:
+                journal_file.close()
+        return report
 
     # bhl
     def _find_license_txt(self, supplied_filepath):
@@ -548,7 +1496,7 @@ class DAPPr(object):
         """
         Embeds one or more Kaltura videos from the Bentley Digital Media Library into a DeepBlue item."""
 
-        item = self.get_handle(handle)
+        item = self.get_handle(handle, expand=())
         item_uuid = item['id']
         if item['type'] != 'item':
             raise DSpaceError("Not an item!")
@@ -562,7 +1510,10 @@ class DAPPr(object):
         return response
 
     def get_metadata_entry_by_key(self, metadata, key):
-        entries = [entry for entry in metadata if entry["key"] == key]
+        if isinstance(metadata, MetadataRecord):
+            entries = metadata.entries(key)
+        else:
+            entries = [entry for entry in metadata if entry["key"] == key]
         if len(entries) == 1:
             return entries[0]
         else:
@@ -574,30 +1525,33 @@ class DAPPr(object):
 
     def update_metadata_entry_by_key(self, metadata, key, value):
         entry = self.get_metadata_entry_by_key(metadata, key)
-        entry["value"] = value
+        if isinstance(metadata, MetadataRecord):
+            metadata.set(key, value)
+        else:
+            entry["value"] = value
 
     def more_title_context(self, handle):
         """
         Adds one ancestor from dc.relation.ispartofseries to the title and takes on away from the dc.relation.ispartofseries."""
 
-        item = self.get_handle(handle)
+        item = self.get_handle(handle, expand=())
         item_uuid = item['id']
         if item['type'] != 'item':
             sys.exit("Not an item!")
-        metadata = self.get_item_metadata(item_uuid)
-        title = self.get_metadata_entry_value_by_key(metadata, "dc.title")
-        relation = self.get_metadata_entry_value_by_key(metadata, "dc.relation.ispartofseries")
+        record = self.get_item_metadata_record(item_uuid)
+        title = self.get_metadata_entry_value_by_key(record, "dc.title")
+        relation = self.get_metadata_entry_value_by_key(record, "dc.relation.ispartofseries")
         more_title_context = relation.split(' - ')[-1] + ' - ' + title
         less_relation_context = ' - '.join(relation.split(' - ')[:-1])
-        self.update_metadata_entry_by_key(metadata, "dc.title", more_title_context)
-        self.update_metadata_entry_by_key(metadata, "dc.relation.ispartofseries", less_relation_context)
-        response = self.put_item_metadata(item_uuid, metadata)
+        self.update_metadata_entry_by_key(record, "dc.title", more_title_context)
+        self.update_metadata_entry_by_key(record, "dc.relation.ispartofseries", less_relation_context)
+        response = self.put_item_metadata_record(item_uuid, record)
         return response
 
     def get_collection_extent_by_series(self, collection_uuid):
         """
         Returns a dictionary with the extent for each series."""
-        items = self.get_collection_items(collection_uuid)
+        items = self.iter_collection_items(collection_uuid, expand={"metadata", "bitstreams"})
 
         series_extent = {}
         for item in items:
@@ -622,45 +1576,305 @@ class DAPPr(object):
             size_bytes += bitstream.get("sizeBytes")
         return size_bytes
 
-    def get_collection_extent(self, collection):
-        size_bytes = 0
-        items = collection.get("items")
-        for item in items:
-            item_uuid = item["uuid"]
-            item_json = self.get_item(item_uuid)
-            size_bytes += self.get_item_extent(item_json)
-        return size_bytes
+    def _get_collection_item_pages(self, collection):
+        """
+        Returns (collection uuid, offset, is last page) for each page of items in a collection, using its numberItems when known."""
 
-    def get_community_extent(self, community):
-        size_bytes = 0
-        collections = community.get("collection")
-        for collection in collections:
-            collection_uuid = collection["uuid"]
-            collection_json = self.get_collection(collection_uuid)
-            size_bytes += self.get_collection_extent(collection_json)
-
-        subcommunities = community.get("subcommunities")
-        for subcommunity in subcommunities:
-            subcommunity_uuid = subcommunity["uuid"]
-            subcommunity_json = self.get_community(subcommunity_uuid)
-            subcommunity_collections = subcommunity_json.get("collections")
-            for subcommunity_collection in subcommunity_collections:
-                subcommunity_collection_uuid = subcommunity_collection["uuid"]
-                subcommunity_collection_json = self.get_collection(subcommunity_collection_uuid)
-                size_bytes += self.get_collection_extent(subcommunity_collection_json)
+        number_items = collection.get("numberItems")
+        if number_items is None:
+            return [(collection["uuid"], 0, True)]
+        offsets = list(range(0, number_items, self.page_size)) or [0]
+        return [(collection["uuid"], offset, offset == offsets[-1]) for offset in offsets]
 
-        return size_bytes
+    def _get_collection_item_page(self, page, expand):
+        collection_uuid, offset, last = page
+        endpoint = "/rest/collections/{}/items".format(collection_uuid)
+        if last:
+            # keep paging past numberItems in case items were added since it was read
+            return self._get_pages(endpoint, expand=expand, offset=offset)
+        params = {"limit": self.page_size, "offset": offset}
+        return self._json(self._get(endpoint, params=params, expand=expand))
 
-    def get_handle_extent(self, handle):
+    def _get_collection_item_page_extent(self, page):
+        return sum(self.get_item_extent(item) for item in self._get_collection_item_page(page, {"bitstreams"}))
+
+    def _get_collections_extent(self, collections, workers=None):
+        pages = [page for collection in collections for page in self._get_collection_item_pages(collection)]
+        return sum(self._map(self._get_collection_item_page_extent, pages, workers))
+
+    def _get_community_tree(self, community, workers=None):
+        """
+        Returns a community and all of its descendant communities, each with collections and subcommunities expanded, fetching one level at a time."""
+
+        expand = {"collections", "subCommunities"}
+        communities = []
+        level = [community]
+        while level:
+            communities.extend(level)
+            subcommunity_uuids = [subcommunity["uuid"] for parent in level for subcommunity in parent.get("subcommunities") or []]
+            level = self._map(lambda uuid: self.get_community(uuid, expand=expand), subcommunity_uuids, workers)
+        return communities
+
+    def get_collection_extent(self, collection, workers=None):
+        return self._get_collections_extent([collection], workers)
+
+    def get_community_extent(self, community, workers=None):
+        communities = self._get_community_tree(community, workers)
+        collections = [collection for tree_community in communities for collection in tree_community.get("collections") or []]
+        return self._get_collections_extent(collections, workers)
+
+    def get_handle_extent(self, handle, workers=None):
         """
-        Returns the total sizeBytes for all Bitstreams on an Item, all Bitstreams on all Items in a Collection, or all Bitstreams on all Items in all Collections (and all Bitstreams on all Items in all Collections in all Sub-Communities) in a Community."""
+        Returns the total sizeBytes for all Bitstreams on an Item, all Bitstreams on all Items in a Collection, or all Bitstreams on all Items in all Collections in a Community and all of its Sub-Communities, at any depth."""
 
-        handle = self.get_handle(handle)
+        handle = self.get_handle(handle, expand={"bitstreams", "collections", "subCommunities"})
         if handle.get("type") == "item":
             size_bytes = self.get_item_extent(handle)
         elif handle.get("type") == "collection":
-            size_bytes = self.get_collection_extent(handle)
+            size_bytes = self.get_collection_extent(handle, workers)
         elif handle.get("type") == "community":
-            size_bytes = self.get_community_extent(handle)
+            size_bytes = self.get_community_extent(handle, workers)
 
         return humanize.naturalsize(size_bytes)
+
+    def extent_report(self, handle, path=None, workers=None):
+        """
+        Returns an ExtentReport of the bytes and number of Bitstreams by Collection, series, format and bundle for an Item, Collection, or Community and all of its Sub-Communities, built in a single pass over their items.
+        Pages of items are fetched concurrently and reduced to totals as they arrive. An Item mapped into several Collections counts towards each of their totals, but only once towards the others.
+        If path is given, the report is also written to it as CSV (for a .csv path) or JSON."""
+
+        obj = self.get_handle(handle, expand={"metadata", "bitstreams", "parentCollection", "collections", "subCommunities"})
+        report = ExtentReport()
+        if obj.get("type") == "item":
+            collection = obj.get("parentCollection") or {}
+            if collection.get("uuid"):
+                report.add_collection(collection)
+            report.add_item(obj, collection.get("uuid"))
+        else:
+            if obj.get("type") == "collection":
+                collections = [obj]
+            else:
+                communities = self._get_community_tree(obj, workers)
+                collections = [collection for community in communities for collection in community.get("collections") or []]
+            pages = []
+            for collection in collections:
+                report.add_collection(collection)
+                pages.extend((page, {"metadata", "bitstreams"}) for page in self._get_collection_item_pages(collection))
+            # pages are added to one report as they arrive, so that an item mapped into several collections is counted once
+            for collection_uuid, items in self._imap(self._get_collection_item_page_index, pages, workers):
+                for item in items:
+                    report.add_item(item, collection_uuid)
+        if path:
+            report.write(path)
+        return report
+
+    def _get_collection_item_page_index(self, task):
+        page, expand = task
+        return page[0], list(self._get_collection_item_page(page, expand))
+
+    def _get_item_bitstreams_index(self, item_uuid):
+        return item_uuid, list(self.iter_item_bitstreams(item_uuid, expand=()))
+
+    def build_index(self, root_handle, path, workers=None):
+        """
+        Crawls the Communities, Collections, and Items under a handle, with the sizes and formats of their Bitstreams, into a HierarchyIndex stored at path, fetching pages of items concurrently.
+        If the index already holds the tree, only Items whose lastModified has changed are fetched again, and objects that no longer exist are removed. Returns the HierarchyIndex."""
+
+        index = HierarchyIndex(path)
+        root = self.get_handle(root_handle, expand={"collections", "subCommunities", "bitstreams"})
+        previous = index.descendant_uuids(root["uuid"])
+        versions = index.item_versions(root["uuid"])
+        seen = set([root["uuid"]])
+        with index.transaction():
+            index.remove_edges(previous)
+            index.add_object(root)
+            if root.get("type") == "item":
+                index.set_bitstreams(root["uuid"], root.get("bitstreams") or [])
+                collections = []
+            elif root.get("type") == "collection":
+                collections = [(root["uuid"], root)]
+            else:
+                collections = []
+                for community in self._get_community_tree(root, workers):
+                    for subcommunity in community.get("subcommunities") or []:
+                        index.add_object(subcommunity, community["uuid"])
+                        seen.add(subcommunity["uuid"])
+                    for collection in community.get("collections") or []:
+                        index.add_object(collection, community["uuid"])
+                        seen.add(collection["uuid"])
+                        collections.append((community["uuid"], collection))
+
+            # a new index gets the bitstreams with each page of items, a refresh only for items that changed
+            expand = () if versions else {"bitstreams"}
+            pages = [(page, expand) for _, collection in collections for page in self._get_collection_item_pages(collection)]
+            changed = []
+            for collection_uuid, items in self._imap(self._get_collection_item_page_index, pages, workers):
+                for item in items:
+                    item["type"] = "item"
+                    index.add_object(item, collection_uuid)
+                    if item["uuid"] in seen:
+                        continue
+                    seen.add(item["uuid"])
+                    if item.get("bitstreams") is not None:
+                        index.set_bitstreams(item["uuid"], item["bitstreams"])
+                    elif item["uuid"] not in versions or versions[item["uuid"]] != item.get("lastModified"):
+                        changed.append(item["uuid"])
+            for item_uuid, bitstreams in self._imap(self._get_item_bitstreams_index, changed, workers):
+                index.set_bitstreams(item_uuid, bitstreams)
+
+            index.remove(previous - seen)
+            index.set_meta("root", root["uuid"])
+            index.set_meta("refreshed", time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()))
+        return index
+
+    def _export_path(self, dest_dir, ancestors, item, bitstream, suffix=None):
+        name = bitstream.get("name") or bitstream["uuid"]
+        if suffix is not None:
+            root, extension = os.path.splitext(name)
+            name = "{}.{}{}".format(root, suffix, extension)
+        parts = [obj.get("handle") or obj["uuid"] for obj in ancestors + (item,)]
+        parts += [bitstream.get("bundleName") or "ORIGINAL", name]
+        return os.path.join(dest_dir, *[part.replace("/", "_").replace(os.sep, "_") for part in parts])
+
+    def _export_suffixes(self, bitstreams):
+        """
+        Returns a suffix for each of an Item's Bitstreams that shares its name with another in the same bundle, so that each is exported to its own file: its sequenceId if that is unique within the Item, or otherwise its uuid."""
+
+        names = {}
+        sequence_ids = {}
+        for bitstream in bitstreams:
+            name = (bitstream.get("bundleName"), bitstream.get("name") or bitstream["uuid"])
+            names[name] = names.get(name, 0) + 1
+            sequence_ids[bitstream.get("sequenceId")] = sequence_ids.get(bitstream.get("sequenceId"), 0) + 1
+        suffixes = []
+        for bitstream in bitstreams:
+            if names[(bitstream.get("bundleName"), bitstream.get("name") or bitstream["uuid"])] == 1:
+                suffixes.append(None)
+            elif bitstream.get("sequenceId") is not None and sequence_ids[bitstream["sequenceId"]] == 1:
+                suffixes.append(bitstream["sequenceId"])
+            else:
+                suffixes.append(bitstream["uuid"])
+        return suffixes
+
+    def _file_matches_bitstream(self, path, bitstream, chunk_size=1024 * 1024):
+        if not os.path.exists(path) or os.path.getsize(path) != bitstream.get("sizeBytes"):
+            return False
+        checksum = bitstream.get("checkSum") or {}
+        if not checksum.get("value"):
+            return True
+        digest = hashlib.new(checksum.get("checkSumAlgorithm", "MD5").lower())
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest() == checksum["value"].lower()
+
+    def _export_bitstream(self, task):
+        bitstream, path = task
+        try:
+            if self._file_matches_bitstream(path, bitstream):
+                return "skipped", bitstream, path, None
+            directory = os.path.dirname(path)
+            if not os.path.isdir(directory):
+                try:
+                    os.makedirs(directory)
+                except OSError:
+                    if not os.path.isdir(directory):
+                        raise
+            self._download_bitstream(bitstream, path)
+            return "downloaded", bitstream, path, None
+        except (DSpaceError, requests.exceptions.RequestException, IOError, OSError) as e:
+            return "failed", bitstream, path, e
+
+    def export_handle(self, handle, dest_dir, workers=None):
+        """
+        Mirrors every Bitstream under an Item, Collection, or Community into a directory tree named by handle and bundle, downloading in parallel and skipping files whose size and checksum already match."""
+
+        def tasks():
+            for ancestors, item in self._walk_handle(handle, expand={"bitstreams"}):
+                bitstreams = item.get("bitstreams") or []
+                for bitstream, suffix in zip(bitstreams, self._export_suffixes(bitstreams)):
+                    yield bitstream, self._export_path(dest_dir, ancestors, item, bitstream, suffix)
+
+        summary = {"downloaded": 0, "skipped": 0, "bytes": 0, "failed": []}
+        for status, bitstream, path, error in self._imap(self._export_bitstream, tasks(), workers):
+            if status == "failed":
+                summary["failed"].append({"uuid": bitstream["uuid"], "path": path, "error": str(error)})
+            else:
+                summary[status] += 1
+                if status == "downloaded":
+                    summary["bytes"] += bitstream.get("sizeBytes") or 0
+        return summary
+
+    def _ingest_item(self, task):
+        collection_uuid, entry = task
+        try:
+            item = self.post_collection_item(collection_uuid, {"metadata": entry.get("metadata", [])})
+            return item["uuid"], None
+        except (DSpaceError, requests.exceptions.RequestException) as e:
+            return None, e
+
+    def _ingest_bitstreams(self, task):
+        # one item's files are uploaded one at a time: DSpace creates an item's ORIGINAL bundle on its
+        # first upload, and concurrent first uploads to a new item can each create one
+        index, item_uuid, paths = task
+        outcomes = []
+        for path in paths:
+            try:
+                if path is None:
+                    self.post_item_license(item_uuid)
+                    outcomes.append((path, None))
+                else:
+                    outcomes.append((path, self.post_item_bitstream(item_uuid, path)["uuid"]))
+            except (DSpaceError, requests.exceptions.RequestException, IOError, OSError) as e:
+                outcomes.append((path, e))
+        return index, outcomes
+
+    def bulk_ingest(self, collection_uuid, manifest, workers=None):
+        """
+        Creates an Item in a Collection for each entry of a manifest and uploads its Bitstreams and license, with at most workers requests in parallel.
+        Items are uploaded to in parallel, but each Item's files are uploaded one at a time, so that DSpace creates a single ORIGINAL bundle for it.
+        Each manifest entry is a dictionary with the Item's "metadata" list, a list of bitstream "files" paths, and optionally "license": True and the "item_uuid" of an Item created by an earlier run."""
+
+        manifest = list(manifest)
+        results = []
+        for entry in manifest:
+            results.append({"item_uuid": entry.get("item_uuid"), "bitstreams": {}, "license": False, "errors": {}})
+
+        new_items = [index for index, result in enumerate(results) if not result["item_uuid"]]
+        created = self._map(self._ingest_item, [(collection_uuid, manifest[index]) for index in new_items], workers)
+        for index, (item_uuid, error) in zip(new_items, created):
+            results[index]["item_uuid"] = item_uuid
+            if error is not None:
+                results[index]["errors"]["item"] = str(error)
+
+        uploads = []
+        for index, (entry, result) in enumerate(zip(manifest, results)):
+            if result["item_uuid"]:
+                paths = list(entry.get("files", []))
+                if entry.get("license"):
+                    paths.append(None)
+                uploads.append((index, result["item_uuid"], paths))
+        for index, outcomes in self._imap(self._ingest_bitstreams, uploads, workers):
+            for path, outcome in outcomes:
+                if isinstance(outcome, Exception):
+                    results[index]["errors"][path or "license"] = str(outcome)
+                elif path is None:
+                    results[index]["license"] = True
+                else:
+                    results[index]["bitstreams"][path] = outcome
+
+        report = {"items": results, "succeeded": 0, "failed": 0, "retry": []}
+        for entry, result in zip(manifest, results):
+            result["status"] = "failed" if result["errors"] else "ingested"
+            if not result["errors"]:
+                report["succeeded"] += 1
+                continue
+            report["failed"] += 1
+            retry_entry = dict(entry)
+            if result["item_uuid"]:
+                # the item exists, so only what failed needs to be sent again
+                retry_entry["item_uuid"] = result["item_uuid"]
+                retry_entry["files"] = [path for path in entry.get("files", []) if path in result["errors"]]
+                retry_entry["license"] = "license" in result["errors"]
+            report["retry"].append(retry_entry)
+        return report
@@ -0,0 +1,244 @@
+import sqlite3
+import threading
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS objects ("
+    "uuid TEXT PRIMARY KEY, type TEXT NOT NULL, handle TEXT, name TEXT, last_modified TEXT)",
+    "CREATE INDEX IF NOT EXISTS objects_handle ON objects (handle)",
+    "CREATE TABLE IF NOT EXISTS edges (parent TEXT NOT NULL, child TEXT NOT NULL, PRIMARY KEY (parent, child))",
+    "CREATE INDEX IF NOT EXISTS edges_child ON edges (child)",
+    "CREATE TABLE IF NOT EXISTS bitstreams ("
+    "uuid TEXT PRIMARY KEY, item TEXT NOT NULL, name TEXT, bundle TEXT, size_bytes INTEGER NOT NULL, mime_type TEXT, format TEXT)",
+    "CREATE INDEX IF NOT EXISTS bitstreams_item ON bitstreams (item)",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+]
+
+DESCENDANTS = (
+    "WITH RECURSIVE descendants(uuid) AS ("
+    "SELECT ? UNION SELECT edges.child FROM edges JOIN descendants ON edges.parent = descendants.uuid) ")
+
+OBJECT_FIELDS = ("uuid", "type", "handle", "name", "last_modified")
+
+
+class HierarchyIndex(object):
+    """
+    A local SQLite index of the communities, collections and items under a DSpace object, with
+    the parent/child edges between them and the size and format of each item's bitstreams,
+    built and refreshed by DAPPr.build_index.
+
+    Lookups, tree walks and extents are answered from the index without contacting DSpace.
+    An item mapped into several collections has an edge from each of them, and is counted
+    once in the extent of any object above it."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            for statement in SCHEMA:
+                self._connection.execute(statement)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _query(self, sql, parameters=()):
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    def _objects(self, sql, parameters=()):
+        return [dict(zip(OBJECT_FIELDS, row)) for row in self._query(sql, parameters)]
+
+    # writing
+    def transaction(self):
+        """
+        Returns a context manager that commits the writes made within it together."""
+
+        return _Transaction(self)
+
+    def add_object(self, obj, parent_uuid=None):
+        """
+        Adds or updates a Community, Collection, or Item, and its edge from parent_uuid."""
+
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO objects (uuid, type, handle, name, last_modified) VALUES (?, ?, ?, ?, ?)",
+                (obj["uuid"], obj.get("type"), obj.get("handle"), obj.get("name"), obj.get("lastModified")))
+            if parent_uuid is not None:
+                self._connection.execute("INSERT OR IGNORE INTO edges (parent, child) VALUES (?, ?)", (parent_uuid, obj["uuid"]))
+
+    def set_bitstreams(self, item_uuid, bitstreams):
+        """
+        Replaces the bitstreams recorded for an item."""
+
+        with self._lock:
+            self._connection.execute("DELETE FROM bitstreams WHERE item = ?", (item_uuid,))
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO bitstreams (uuid, item, name, bundle, size_bytes, mime_type, format) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(bitstream["uuid"], item_uuid, bitstream.get("name"), bitstream.get("bundleName"), bitstream.get("sizeBytes") or 0,
+                  bitstream.get("mimeType"), bitstream.get("format")) for bitstream in bitstreams])
+
+    def remove(self, uuids):
+        """
+        Removes objects, their edges, and their bitstreams."""
+
+        with self._lock:
+            for uuid in uuids:
+                self._connection.execute("DELETE FROM objects WHERE uuid = ?", (uuid,))
+                self._connection.execute("DELETE FROM edges WHERE parent = ? OR child = ?", (uuid, uuid))
+                self._connection.execute("DELETE FROM bitstreams WHERE item = ?", (uuid,))
+
+    def remove_edges(self, parent_uuids):
+        """
+        Removes the edges from objects to their children, e.g. before recording the children found by a new crawl."""
+
+        with self._lock:
+            self._connection.executemany("DELETE FROM edges WHERE parent = ?", [(uuid,) for uuid in parent_uuids])
+
+    def set_meta(self, key, value):
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def get_meta(self, key, default=None):
+        rows = self._query("SELECT value FROM meta WHERE key = ?", (key,))
+        return rows[0][0] if rows else default
+
+    # queries
+    def get(self, uuid):
+        """
+        Returns the object with uuid, or None."""
+
+        objects = self._objects("SELECT uuid, type, handle, name, last_modified FROM objects WHERE uuid = ?", (uuid,))
+        return objects[0] if objects else None
+
+    def lookup(self, handle):
+        """
+        Returns the object with handle, or None."""
+
+        objects = self._objects("SELECT uuid, type, handle, name, last_modified FROM objects WHERE handle = ?", (handle,))
+        return objects[0] if objects else None
+
+    def parents(self, uuid):
+        """
+        Returns the objects directly containing an object, e.g. the collections of an item."""
+
+        return self._objects(
+            "SELECT uuid, type, handle, name, last_modified FROM objects JOIN edges ON edges.parent = objects.uuid "
+            "WHERE edges.child = ? ORDER BY objects.name", (uuid,))
+
+    def ancestors(self, uuid):
+        """
+        Returns the chain of objects containing an object, from its first parent up to the top of the index."""
+
+        chain = []
+        seen = set([uuid])
+        parents = self.parents(uuid)
+        while parents:
+            parent = parents[0]
+            if parent["uuid"] in seen:
+                break
+            seen.add(parent["uuid"])
+            chain.append(parent)
+            parents = self.parents(parent["uuid"])
+        return chain
+
+    def children(self, uuid, type=None):
+        """
+        Returns the objects directly within an object, optionally only those of a type ("community", "collection", or "item")."""
+
+        sql = ("SELECT uuid, type, handle, name, last_modified FROM objects JOIN edges ON edges.child = objects.uuid "
+               "WHERE edges.parent = ?")
+        parameters = [uuid]
+        if type is not None:
+            sql += " AND objects.type = ?"
+            parameters.append(type)
+        return self._objects(sql + " ORDER BY objects.name", parameters)
+
+    def descendants(self, uuid, type=None):
+        """
+        Returns every object within an object at any depth, optionally only those of a type."""
+
+        sql = (DESCENDANTS + "SELECT objects.uuid, type, handle, name, last_modified FROM objects "
+               "JOIN descendants ON descendants.uuid = objects.uuid WHERE objects.uuid != ?")
+        parameters = [uuid, uuid]
+        if type is not None:
+            sql += " AND objects.type = ?"
+            parameters.append(type)
+        return self._objects(sql + " ORDER BY objects.name", parameters)
+
+    def items(self, uuid):
+        """
+        Returns every item within an object at any depth."""
+
+        return self.descendants(uuid, type="item")
+
+    def bitstreams(self, uuid):
+        """
+        Returns the bitstreams of every item within an object at any depth, or of an item."""
+
+        rows = self._query(
+            DESCENDANTS + "SELECT uuid, item, name, bundle, size_bytes, mime_type, format FROM bitstreams "
+            "WHERE item IN (SELECT uuid FROM descendants) ORDER BY item, name", (uuid,))
+        fields = ("uuid", "item", "name", "bundleName", "sizeBytes", "mimeType", "format")
+        return [dict(zip(fields, row)) for row in rows]
+
+    def extent(self, uuid):
+        """
+        Returns the total sizeBytes of the bitstreams of every item within an object, or of an item."""
+
+        rows = self._query(
+            DESCENDANTS + "SELECT COALESCE(SUM(size_bytes), 0) FROM bitstreams WHERE item IN (SELECT uuid FROM descendants)", (uuid,))
+        return rows[0][0]
+
+    def extent_by_child(self, uuid):
+        """
+        Returns a list of the objects directly within an object, each with the total sizeBytes within it as "extent"."""
+
+        children = self.children(uuid)
+        for child in children:
+            child["extent"] = self.extent(child["uuid"])
+        return children
+
+    def extent_by_format(self, uuid):
+        """
+        Returns a dictionary of the total sizeBytes of the bitstreams within an object for each mimeType."""
+
+        rows = self._query(
+            DESCENDANTS + "SELECT mime_type, SUM(size_bytes) FROM bitstreams WHERE item IN (SELECT uuid FROM descendants) "
+            "GROUP BY mime_type", (uuid,))
+        return dict(rows)
+
+    def item_versions(self, uuid):
+        """
+        Returns a dictionary of the lastModified of every item within an object, as recorded in the index."""
+
+        rows = self._query(DESCENDANTS + "SELECT objects.uuid, last_modified FROM objects JOIN descendants "
+                           "ON descendants.uuid = objects.uuid WHERE type = 'item'", (uuid,))
+        return dict(rows)
+
+    def descendant_uuids(self, uuid):
+        return set(row[0] for row in self._query(DESCENDANTS + "SELECT uuid FROM descendants", (uuid,)))
+
+
+class _Transaction(object):
+    def __init__(self, index):
+        self.index = index
+
+    def __enter__(self):
+        self.index._lock.acquire()
+        return self.index
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.index._connection.commit()
+            else:
+                self.index._connection.rollback()
+        finally:
+            self.index._lock.release()
@@ -0,0 +1,153 @@
+from collections import OrderedDict
+
+
+class MetadataRecord(object):
+    """
+    The metadata of a DSpace item, indexed by key.
+
+    Built from the list of MetadataEntry dictionaries returned by get_item_metadata, a record
+    looks up, replaces, appends and removes the values of a key without scanning the whole
+    list, holds any number of values per key (e.g., dc.contributor.author), and tracks the keys
+    changed since it was loaded so that unchanged records, and unchanged keys, need not be
+    written back. to_list returns the list of MetadataEntry dictionaries expected by put_item_metadata."""
+
+    def __init__(self, metadata=None):
+        self._index = OrderedDict()
+        for entry in metadata or []:
+            self._index.setdefault(entry["key"], []).append(dict(entry))
+        self._original = {}
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._index.values())
+
+    def __repr__(self):
+        return "MetadataRecord({!r})".format(self.to_list())
+
+    @property
+    def dirty(self):
+        """
+        Whether any key has different values than when the record was loaded or last marked clean."""
+
+        return bool(self.changed_keys())
+
+    def keys(self):
+        return list(self._index)
+
+    def entries(self, key):
+        """
+        Returns the MetadataEntry dictionaries of key, in order."""
+
+        return list(self._index.get(key, []))
+
+    def get(self, key, default=None):
+        """
+        Returns the first value of key, or default if the record has no value for key."""
+
+        entries = self._index.get(key)
+        return entries[0]["value"] if entries else default
+
+    def get_all(self, key):
+        """
+        Returns every value of key, in order."""
+
+        return [entry["value"] for entry in self._index.get(key, [])]
+
+    def set(self, key, value, language=None):
+        """
+        Replaces the values of key with value, or with each value in a list of values.
+
+        Unless language is given, each new value keeps the language and other fields of the entry
+        it replaces, and values beyond the existing entries take those of the last one."""
+
+        values = value if isinstance(value, (list, tuple)) else [value]
+        if not values:
+            self.remove(key)
+            return
+        existing = self._index.get(key, [])
+        entries = []
+        for position, v in enumerate(values):
+            if language is None and existing:
+                entry = dict(existing[min(position, len(existing) - 1)], value=v)
+            else:
+                entry = self._entry(key, v, language)
+            entries.append(entry)
+        if entries == existing:
+            return
+        self._touch(key)
+        self._index[key] = entries
+
+    def append(self, key, value, language=None):
+        """
+        Adds value as the last value of key."""
+
+        self._touch(key)
+        self._index.setdefault(key, []).append(self._entry(key, value, language))
+
+    def remove(self, key, value=None):
+        """
+        Removes every value of key, or only the entries of key with value. Returns the number of entries removed."""
+
+        entries = self._index.get(key)
+        if not entries:
+            return 0
+        kept = [] if value is None else [entry for entry in entries if entry["value"] != value]
+        removed = len(entries) - len(kept)
+        if removed:
+            self._touch(key)
+            if kept:
+                self._index[key] = kept
+            else:
+                del self._index[key]
+        return removed
+
+    def changed_keys(self):
+        """
+        Returns the keys whose entries differ from when the record was loaded or last marked clean."""
+
+        return [key for key, entries in self._original.items() if entries != self._index.get(key, [])]
+
+    def diff(self):
+        """
+        Returns a list with a dictionary of the removed and added values of each changed key."""
+
+        changes = []
+        for key in self.changed_keys():
+            removed = [entry["value"] for entry in self._original[key]]
+            added = []
+            for value in self.get_all(key):
+                if value in removed:
+                    removed.remove(value)
+                else:
+                    added.append(value)
+            changes.append({"key": key, "removed": removed, "added": added})
+        return changes
+
+    def mark_clean(self):
+        """
+        Marks the record as written, e.g. after put_item_metadata."""
+
+        self._original = {}
+
+    def to_list(self, keys=None):
+        """
+        Returns the metadata, or only the entries of keys, as a list of MetadataEntry dictionaries."""
+
+        keys = list(self._index) if keys is None else [key for key in keys if key in self._index]
+        return [dict(entry) for key in keys for entry in self._index[key]]
+
+    def _touch(self, key):
+        if key not in self._original:
+            self._original[key] = [dict(entry) for entry in self._index.get(key, [])]
+
+    @staticmethod
+    def _entry(key, value, language):
+        entry = {"key": key, "value": value}
+        if language is not None:
+            entry["language"] = language
+        return entry
@@ -0,0 +1,144 @@
+import re
+import sys
+import threading
+
+if sys.version_info[:2] <= (2, 7):
+    # Python 2
+    from urlparse import urlparse
+else:
+    # Python 3
+    from urllib.parse import urlparse
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+UUID_PATTERN = re.compile(r"/[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}(?=/|$)")
+ID_PATTERN = re.compile(r"/\d+(?=/|$)")
+
+
+def normalize_endpoint(url):
+    """
+    Returns the path of a REST API URL with uuids, handles and numeric ids replaced by placeholders, e.g. /rest/items/{uuid}/bitstreams."""
+
+    path = urlparse(url).path
+    if "/rest/handle/" in path:
+        return path[:path.index("/rest/handle/")] + "/rest/handle/{handle}"
+    path = UUID_PATTERN.sub("/{uuid}", path)
+    return ID_PATTERN.sub("/{id}", path)
+
+
+def _body_size(body):
+    if body is None:
+        return 0
+    try:
+        return len(body)
+    except TypeError:
+        return 0
+
+
+def _response_size(response):
+    content_length = response.headers.get("Content-Length")
+    if content_length is not None and content_length.isdigit():
+        return int(content_length)
+    # the body of a streamed response is only known once it has been read
+    if getattr(response, "_content_consumed", False) and response._content:
+        return len(response._content)
+    return 0
+
+
+class MetricsCollector(object):
+    """
+    A request hook that counts requests, errors (responses with a status of 400 or more, and
+    requests that failed without a response), retries, bytes sent and received, and a histogram
+    of latencies, for each method and endpoint.
+
+    Endpoints are normalized by normalize_endpoint, so every item is counted under
+    /rest/items/{uuid}. as_dict returns the metrics as a dictionary and prometheus in the
+    Prometheus text exposition format."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _record(self, method, url, seconds, attempt, error, bytes_sent=0, bytes_received=0):
+        key = (method, normalize_endpoint(url))
+        with self._lock:
+            metrics = self._metrics.get(key)
+            if metrics is None:
+                metrics = self._metrics[key] = {
+                    "count": 0, "errors": 0, "retries": 0, "bytes_sent": 0, "bytes_received": 0,
+                    "seconds": 0.0, "buckets": [0] * len(self.buckets)}
+            metrics["count"] += 1
+            metrics["errors"] += 1 if error else 0
+            metrics["retries"] += 1 if attempt else 0
+            metrics["bytes_sent"] += bytes_sent
+            metrics["bytes_received"] += bytes_received
+            metrics["seconds"] += seconds
+            for index, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    metrics["buckets"][index] += 1
+                    break
+
+    def after_response(self, method, url, response, seconds, attempt):
+        self._record(method, url, seconds, attempt, response.status_code >= 400,
+                     bytes_sent=_body_size(response.request.body), bytes_received=_response_size(response))
+
+    def on_error(self, method, url, error, seconds, attempt):
+        self._record(method, url, seconds, attempt, True)
+
+    def reset(self):
+        with self._lock:
+            self._metrics = {}
+
+    def as_dict(self):
+        """
+        Returns a dictionary of the metrics for each "METHOD endpoint", with the cumulative number of requests that took at most each bucket's seconds in histogram."""
+
+        with self._lock:
+            snapshot = [(key, dict(metrics, buckets=list(metrics["buckets"]))) for key, metrics in self._metrics.items()]
+        result = {}
+        for (method, endpoint), metrics in sorted(snapshot):
+            histogram = []
+            cumulative = 0
+            for bound, count in zip(self.buckets, metrics.pop("buckets")):
+                cumulative += count
+                histogram.append((bound, cumulative))
+            metrics["histogram"] = histogram
+            metrics["error_rate"] = metrics["errors"] / float(metrics["count"])
+            metrics["mean_seconds"] = metrics["seconds"] / metrics["count"]
+            result["{} {}".format(method, endpoint)] = dict(metrics, method=method, endpoint=endpoint)
+        return result
+
+    def prometheus(self, prefix="dappr"):
+        """
+        Returns the metrics in the Prometheus text exposition format."""
+
+        metrics = self.as_dict().values()
+        counters = [
+            ("requests_total", "count", "Requests sent to DSpace."),
+            ("request_errors_total", "errors", "Requests answered with a status of 400 or more or failed without a response."),
+            ("request_retries_total", "retries", "Requests that were retries of an earlier attempt."),
+            ("request_sent_bytes_total", "bytes_sent", "Bytes of request bodies sent to DSpace."),
+            ("request_received_bytes_total", "bytes_received", "Bytes of response bodies received from DSpace."),
+        ]
+        lines = []
+        for name, field, description in counters:
+            lines.append("# HELP {}_{} {}".format(prefix, name, description))
+            lines.append("# TYPE {}_{} counter".format(prefix, name))
+            for metric in metrics:
+                lines.append("{}_{}{{{}}} {}".format(prefix, name, self._labels(metric), metric[field]))
+        name = "{}_request_duration_seconds".format(prefix)
+        lines.append("# HELP {} Time from sending a request to DSpace to receiving its response headers.".format(name))
+        lines.append("# TYPE {} histogram".format(name))
+        for metric in metrics:
+            labels = self._labels(metric)
+            for bound, count in metric["histogram"]:
+                lines.append('{}_bucket{{{},le="{}"}} {}'.format(name, labels, bound, count))
+            lines.append('{}_bucket{{{},le="+Inf"}} {}'.format(name, labels, metric["count"]))
+            lines.append("{}_sum{{{}}} {}".format(name, labels, metric["seconds"]))
+            lines.append("{}_count{{{}}} {}".format(name, labels, metric["count"]))
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _labels(metric):
+        return 'method="{}",endpoint="{}"'.format(metric["method"], metric["endpoint"].replace("\\", "\\\\").replace('"', '\\"'))
@@ -0,0 +1,661 @@
+import argparse
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid as uuid_module
+
+if sys.version_info[:2] <= (2, 7):
+    # Python 2
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urllib import unquote
+    from urlparse import parse_qs, urlparse
+else:
+    # Python 3
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import parse_qs, unquote, urlparse
+
+# the fields DSpace 6 keeps when an item's metadata is cleared
+KEPT_METADATA = frozenset(["dc.date.accessioned", "dc.date.available", "dc.identifier.uri", "dc.description.provenance"])
+
+
+class MockRepository(object):
+    """
+    A synthetic DSpace repository of communities, collections, items and bitstreams, held in memory.
+
+    Each of the top-level communities has collections of items with bitstreams of random sizes
+    between min_size and max_size, and a chain of subcommunities depth levels deep, each with
+    the same number of collections. The same seed always generates the same repository."""
+
+    def __init__(self, communities=2, depth=2, collections=2, items=20, bitstreams=2,
+                 min_size=1024, max_size=65536, seed=0, handle_prefix="2027.42"):
+        self.random = random.Random(seed)
+        self.handle_prefix = handle_prefix
+        self.handle_counter = 0
+        self.lock = threading.RLock()
+        self.objects = {}
+        self.handles = {}
+        self.top_communities = []
+        self.min_size = min_size
+        self.max_size = max_size
+        for _ in range(communities):
+            community = self._add_community(None)
+            self.top_communities.append(community["uuid"])
+            self._populate(community, depth - 1, collections, items, bitstreams)
+
+    def _uuid(self):
+        return str(uuid_module.UUID(int=self.random.getrandbits(128)))
+
+    def _handle(self):
+        self.handle_counter += 1
+        return "{}/{}".format(self.handle_prefix, self.handle_counter)
+
+    def _register(self, obj):
+        self.objects[obj["uuid"]] = obj
+        if obj.get("handle"):
+            self.handles[obj["handle"]] = obj["uuid"]
+        return obj
+
+    def _populate(self, community, depth, collections, items, bitstreams):
+        for _ in range(collections):
+            collection = self._add_collection(community["uuid"])
+            for _ in range(items):
+                item = self.add_item(collection["uuid"])
+                for _ in range(bitstreams):
+                    size = self.random.randint(self.min_size, self.max_size)
+                    self.add_bitstream(item["uuid"], size=size)
+        if depth > 0:
+            subcommunity = self._add_community(community["uuid"])
+            self._populate(subcommunity, depth - 1, collections, items, bitstreams)
+
+    def _add_community(self, parent_uuid):
+        community = self._register({
+            "uuid": self._uuid(), "type": "community", "handle": self._handle(),
+            "parent": parent_uuid, "subcommunities": [], "collections": []})
+        community["name"] = "Community {}".format(community["handle"])
+        if parent_uuid:
+            self.objects[parent_uuid]["subcommunities"].append(community["uuid"])
+        return community
+
+    def _add_collection(self, community_uuid):
+        collection = self._register({
+            "uuid": self._uuid(), "type": "collection", "handle": self._handle(),
+            "parent": community_uuid, "items": []})
+        collection["name"] = "Collection {}".format(collection["handle"])
+        self.objects[community_uuid]["collections"].append(collection["uuid"])
+        return collection
+
+    def _touch(self, item):
+        item["lastModified"] = time.strftime("%Y-%m-%d %H:%M:%S.000", time.gmtime()) + ".{:06d}".format(self.handle_counter)
+        self.handle_counter += 1
+
+    def add_item(self, collection_uuid, metadata=None):
+        with self.lock:
+            item = self._register({
+                "uuid": self._uuid(), "type": "item", "handle": self._handle(),
+                "parent": collection_uuid, "mapped": [], "bitstreams": []})
+            if metadata is None:
+                series = "Series {} - Subseries {}".format(self.random.randint(1, 3), self.random.randint(1, 3))
+                metadata = [
+                    {"key": "dc.title", "value": "Item {}".format(item["handle"]), "language": None},
+                    {"key": "dc.relation.ispartofseries", "value": series, "language": None},
+                    {"key": "dc.contributor.author", "value": "Author A", "language": None},
+                    {"key": "dc.contributor.author", "value": "Author B", "language": None},
+                    {"key": "dc.date.accessioned", "value": "2020-01-01T00:00:00Z", "language": None},
+                    {"key": "dc.date.available", "value": "2020-01-01T00:00:00Z", "language": None},
+                    {"key": "dc.identifier.uri", "value": "https://hdl.handle.net/{}".format(item["handle"]), "language": None},
+                    {"key": "dc.description.provenance", "value": "Made available in DSpace on 2020-01-01T00:00:00Z", "language": "en"},
+                ]
+            item["metadata"] = metadata
+            item["name"] = next((entry["value"] for entry in metadata if entry["key"] == "dc.title"), None)
+            self._touch(item)
+            self.objects[collection_uuid]["items"].append(item["uuid"])
+            return item
+
+    def map_item(self, collection_uuid, item_uuid):
+        """
+        Maps an item into a collection other than the one that owns it."""
+
+        with self.lock:
+            self.objects[collection_uuid]["items"].append(item_uuid)
+            self.objects[item_uuid]["mapped"].append(collection_uuid)
+
+    def unmap_item(self, collection_uuid, item_uuid):
+        with self.lock:
+            self.objects[collection_uuid]["items"].remove(item_uuid)
+            self.objects[item_uuid]["mapped"].remove(collection_uuid)
+
+    def withdraw_item(self, item_uuid):
+        """
+        Withdraws an item, which leaves it out of listings after the page is taken, as DSpace does, so a page can be short before the last one."""
+
+        with self.lock:
+            self.objects[item_uuid]["withdrawn"] = True
+
+    def add_bitstream(self, item_uuid, size=None, data=None, name=None, bundle="ORIGINAL"):
+        with self.lock:
+            bitstream_uuid = self._uuid()
+            if data is None:
+                data = (bitstream_uuid.encode("ascii") * (size // 36 + 1))[:size]
+            formats = [("application/pdf", "Adobe PDF"), ("image/jpeg", "JPEG"), ("video/mp4", "MPEG-4"), ("text/plain", "Text")]
+            mime_type, format_name = self.random.choice(formats)
+            bitstream = self._register({
+                "uuid": bitstream_uuid, "type": "bitstream", "handle": None,
+                "name": name or "file-{}.bin".format(bitstream_uuid[:8]), "bundleName": bundle,
+                "parent": item_uuid, "mimeType": mime_type, "format": format_name,
+                "data": data, "policies": [{"action": "READ", "groupId": "anonymous", "rpType": "TYPE_INHERITED"}]})
+            self.objects[item_uuid]["bitstreams"].append(bitstream_uuid)
+            self._touch(self.objects[item_uuid])
+            return bitstream
+
+    def delete(self, obj_uuid):
+        with self.lock:
+            obj = self.objects.pop(obj_uuid, None)
+            if obj is None:
+                return False
+            if obj.get("handle"):
+                self.handles.pop(obj["handle"], None)
+            for child_key in ("subcommunities", "collections", "items", "bitstreams"):
+                for child_uuid in list(obj.get(child_key, [])):
+                    if child_key == "items" and self.objects[child_uuid]["parent"] != obj_uuid:
+                        # deleting a collection only unmaps the items other collections own
+                        self.objects[child_uuid]["mapped"].remove(obj_uuid)
+                    else:
+                        self.delete(child_uuid)
+            for collection_uuid in obj.get("mapped", []):
+                self.objects[collection_uuid]["items"].remove(obj_uuid)
+            parent = self.objects.get(obj.get("parent"))
+            if parent:
+                for child_key in ("subcommunities", "collections", "items", "bitstreams"):
+                    if obj_uuid in parent.get(child_key, []):
+                        parent[child_key].remove(obj_uuid)
+                if parent["type"] == "item":
+                    self._touch(parent)
+            elif obj_uuid in self.top_communities:
+                self.top_communities.remove(obj_uuid)
+            return True
+
+    def total_bytes(self, obj_uuid):
+        obj = self.objects[obj_uuid]
+        if obj["type"] == "bitstream":
+            return len(obj["data"])
+        return sum(self.total_bytes(child) for key in ("subcommunities", "collections", "items", "bitstreams") for child in obj.get(key, []))
+
+    # serialisation
+    def serialize(self, obj, expand=()):
+        expand = set(expand)
+        if "all" in expand:
+            expand = {"all", "metadata", "bitstreams", "parentCollection", "parentCollectionList", "collections", "subCommunities",
+                      "items", "parentCommunity", "policies", "parent"}
+        data = {"uuid": obj["uuid"], "id": obj["uuid"], "name": obj.get("name"), "handle": obj.get("handle"),
+                "type": obj["type"], "link": "/rest/{}s/{}".format(obj["type"], obj["uuid"])}
+        if obj["type"] == "community":
+            data["countItems"] = self.count_items(obj)
+            data["subcommunities"] = [self.serialize(self.objects[u]) for u in obj["subcommunities"]] if "subCommunities" in expand else []
+            data["collections"] = [self.serialize(self.objects[u]) for u in obj["collections"]] if "collections" in expand else []
+            if "parentCommunity" in expand and obj["parent"]:
+                data["parentCommunity"] = self.serialize(self.objects[obj["parent"]])
+        elif obj["type"] == "collection":
+            data["numberItems"] = len(obj["items"])
+            data["items"] = [self.serialize(self.objects[u]) for u in obj["items"]] if "items" in expand else []
+            if "parentCommunity" in expand:
+                data["parentCommunity"] = self.serialize(self.objects[obj["parent"]])
+        elif obj["type"] == "item":
+            data["lastModified"] = obj["lastModified"]
+            data["archived"] = "true"
+            data["withdrawn"] = "false"
+            data["metadata"] = [dict(entry) for entry in obj["metadata"]] if "metadata" in expand else None
+            data["bitstreams"] = [self.serialize(self.objects[u]) for u in obj["bitstreams"]] if "bitstreams" in expand else None
+            if "parentCollection" in expand:
+                data["parentCollection"] = self.serialize(self.objects[obj["parent"]])
+            if "parentCollectionList" in expand:
+                data["parentCollectionList"] = [self.serialize(self.objects[u]) for u in [obj["parent"]] + obj["mapped"]]
+        elif obj["type"] == "bitstream":
+            data.update({
+                "bundleName": obj["bundleName"], "mimeType": obj["mimeType"], "format": obj["format"],
+                "sizeBytes": len(obj["data"]), "description": None, "sequenceId": 1,
+                "retrieveLink": "/rest/bitstreams/{}/retrieve".format(obj["uuid"]),
+                "checkSum": {"value": hashlib.md5(obj["data"]).hexdigest(), "checkSumAlgorithm": "MD5"}})
+            data["policies"] = [dict(policy) for policy in obj["policies"]] if "policies" in expand else None
+            if "parent" in expand:
+                data["parentObject"] = self.serialize(self.objects[obj["parent"]])
+        data["expand"] = sorted(expand)
+        return data
+
+    def count_items(self, community):
+        count = sum(len(self.objects[u]["items"]) for u in community["collections"])
+        return count + sum(self.count_items(self.objects[u]) for u in community["subcommunities"])
+
+
+class MockDSpaceServer(ThreadingMixIn, HTTPServer):
+    """
+    A local stand-in for the DSpace 6 REST API endpoints used by DAPPr, answering from a MockRepository.
+
+    Each request is delayed by latency seconds to simulate a remote server, and a failure_rate
+    fraction of requests is answered with a 503 to exercise retries. With etags, JSON responses
+    carry an ETag and conditional requests are answered with a 304. request_count and bytes_sent
+    count what the server has handled, e.g. to compare the traffic of two ways of doing the same work."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, repository=None, host="127.0.0.1", port=0, latency=0.0, email="user@example.com",
+                 password="password", etags=False, failure_rate=0.0):
+        HTTPServer.__init__(self, (host, port), MockRequestHandler)
+        self.repository = repository or MockRepository()
+        self.latency = latency
+        self.email = email
+        self.password = password
+        self.etags = etags
+        self.failure_rate = failure_rate
+        self.failure_random = random.Random(0)
+        self.sessions = set()
+        self.request_count = 0
+        self.bytes_sent = 0
+        self.counter_lock = threading.Lock()
+        self.thread = None
+
+    @property
+    def base_url(self):
+        return "http://{}:{}".format(*self.server_address[:2])
+
+    def start(self):
+        # a short poll interval lets stop return quickly, e.g. between tests
+        self.thread = threading.Thread(target=self.serve_forever, kwargs={"poll_interval": 0.05})
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body are written separately, which Nagle's algorithm would delay on kept-alive connections
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    # plumbing
+    def _dispatch(self, method):
+        server = self.server
+        with server.counter_lock:
+            server.request_count += 1
+        if server.latency:
+            time.sleep(server.latency)
+        if server.failure_rate and server.failure_random.random() < server.failure_rate:
+            self._read_body()
+            return self._send(503, "Service Unavailable", content_type="text/plain", headers={"Retry-After": "0"})
+        parsed = urlparse(self.path)
+        self.query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        self.body = self._read_body()
+        path = unquote(parsed.path)
+        for route_method, pattern, handler in ROUTES:
+            if route_method != method:
+                continue
+            match = re.match(pattern + "$", path)
+            if match:
+                if handler.__name__ != "login" and not self._authenticated():
+                    return self._send(401, "Unauthorized", content_type="text/plain")
+                with server.repository.lock:
+                    return handler(self, *match.groups())
+        return self._send(404, "Not found", content_type="text/plain")
+
+    def _read_body(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+            return b"".join(chunks)
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _authenticated(self):
+        cookies = self.headers.get("Cookie", "")
+        match = re.search(r"JSESSIONID=([^;]+)", cookies)
+        return bool(match) and match.group(1) in self.server.sessions
+
+    def _send(self, status, body=b"", content_type="application/json", headers=None):
+        if not isinstance(body, bytes):
+            body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+        with self.server.counter_lock:
+            self.server.bytes_sent += len(body)
+
+    def _send_json(self, data, status=200):
+        body = json.dumps(data).encode("utf-8")
+        headers = {}
+        if self.server.etags:
+            etag = '"{}"'.format(hashlib.md5(body).hexdigest())
+            headers["ETag"] = etag
+            if self.headers.get("If-None-Match") == etag:
+                return self._send(304, b"", headers=headers)
+        return self._send(status, body, headers=headers)
+
+    def _expand(self):
+        return [value for value in self.query.get("expand", "").split(",") if value]
+
+    def _page(self, uuids):
+        offset = int(self.query.get("offset", 0))
+        limit = int(self.query.get("limit", 100))
+        return uuids[offset:offset + limit]
+
+    def _object(self, obj_uuid, obj_type):
+        obj = self.server.repository.objects.get(obj_uuid)
+        if obj is None or obj["type"] != obj_type:
+            return None
+        return obj
+
+    def _list(self, uuids):
+        repository = self.server.repository
+        # like DSpace, objects the user cannot see are filtered out of the page after limit and offset are applied
+        objects = [repository.objects[u] for u in self._page(uuids)]
+        return self._send_json([repository.serialize(obj, self._expand()) for obj in objects if not obj.get("withdrawn")])
+
+    def _get_one(self, obj_uuid, obj_type):
+        obj = self._object(obj_uuid, obj_type)
+        if obj is None:
+            return self._send(404, "Not found", content_type="text/plain")
+        return self._send_json(self.server.repository.serialize(obj, self._expand()))
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    # endpoints
+    def login(self):
+        if self.query.get("email") == self.server.email and self.query.get("password") == self.server.password:
+            token = uuid_module.uuid4().hex
+            self.server.sessions.add(token)
+            return self._send(200, "", content_type="text/plain", headers={"Set-Cookie": "JSESSIONID={}; Path=/rest".format(token)})
+        return self._send(401, "Bad credentials", content_type="text/plain")
+
+    def logout(self):
+        match = re.search(r"JSESSIONID=([^;]+)", self.headers.get("Cookie", ""))
+        self.server.sessions.discard(match.group(1))
+        return self._send(200, "", content_type="text/plain")
+
+    def status(self):
+        return self._send_json({"okay": True, "authenticated": self._authenticated(), "email": self.server.email})
+
+    def list_communities(self):
+        repository = self.server.repository
+        return self._list([u for u, obj in repository.objects.items() if obj["type"] == "community"])
+
+    def list_top_communities(self):
+        return self._list(self.server.repository.top_communities)
+
+    def get_community(self, obj_uuid):
+        return self._get_one(obj_uuid, "community")
+
+    def list_community_children(self, obj_uuid, kind):
+        obj = self._object(obj_uuid, "community")
+        if obj is None:
+            return self._send(404, "Not found", content_type="text/plain")
+        return self._list(obj["collections" if kind == "collections" else "subcommunities"])
+
+    def list_collections(self):
+        repository = self.server.repository
+        return self._list([u for u, obj in repository.objects.items() if obj["type"] == "collection"])
+
+    def get_collection(self, obj_uuid):
+        return self._get_one(obj_uuid, "collection")
+
+    def list_collection_items(self, obj_uuid):
+        obj = self._object(obj_uuid, "collection")
+        if obj is None:
+            return self._send(404, "Not found", content_type="text/plain")
+        return self._list(obj["items"])
+
+    def post_collection_item(self, obj_uuid):
+        if self._object(obj_uuid, "collection") is None:
+            return self._send(404, "Not found", content_type="text/plain")
+        posted = json.loads(self.body.decode("utf-8"))
+        item = self.server.repository.add_item(obj_uuid, metadata=posted.get("metadata", []))
+        return self._send_json(self.server.repository.serialize(item))
+
+    def delete_collection_item(self, obj_uuid, item_uuid):
+        repository = self.server.repository
+        collection = self._object(obj_uuid, "collection")
+        if collection is None or item_uuid not in collection["items"]:
+            return self._send(404, "Not found", content_type="text/plain")
+        # removing an item from the collection that owns it deletes it, as in DSpace
+        if repository.objects[item_uuid]["parent"] == obj_uuid:
+            repository.delete(item_uuid)
+        else:
+            repository.unmap_item(obj_uuid, item_uuid)
+        return self._send(200, "", content_type="text/plain")
+
+    def list_items(self):
+        repository = self.server.repository
+        return self._list([u for u, obj in repository.objects.items() if obj["type"] == "item"])
+
+    def get_item(self, obj_uuid):
+        return self._get_one(obj_uuid, "item")
+
+    def item_metadata(self, obj_uuid):
+        item = self._object(obj_uuid, "item")
+        if item is None:
+            return self._send(404, "Not found", content_type="text/plain")
+        if self.command == "GET":
+            return self._send_json(item["metadata"])
+        if self.command == "DELETE":
+            # like DSpace 6, clearing an item's metadata keeps the fields DSpace manages
+            item["metadata"] = [e for e in item["metadata"] if e["key"] in KEPT_METADATA]
+        else:
+            entries = [{"key": e["key"], "value": e["value"], "language": e.get("language")} for e in json.loads(self.body.decode("utf-8"))]
+            if self.command == "PUT":
+                # like DSpace 6, a PUT replaces the values of the keys it contains and keeps the others
+                keys = set(e["key"] for e in entries)
+                item["metadata"] = [e for e in item["metadata"] if e["key"] not in keys] + entries
+            else:
+                item["metadata"] = item["metadata"] + entries
+        self.server.repository._touch(item)
+        return self._send(200, "", content_type="text/plain")
+
+    def list_item_bitstreams(self, obj_uuid):
+        item = self._object(obj_uuid, "item")
+        if item is None:
+            return self._send(404, "Not found", content_type="text/plain")
+        return self._list(item["bitstreams"])
+
+    def post_item_bitstream(self, obj_uuid):
+        if self._object(obj_uuid, "item") is None:
+            return self._send(404, "Not found", content_type="text/plain")
+        name = self.query.get("name")
+        disposition = self.headers.get("Content-Disposition", "")
+        match = re.search(r"filename=(.+)$", disposition)
+        if not name and match:
+            name = unquote(match.group(1))
+        bitstream = self.server.repository.add_bitstream(obj_uuid, data=self.body, name=name)
+        return self._send_json(self.server.repository.serialize(bitstream))
+
+    def delete_item_bitstream(self, obj_uuid, bitstream_uuid):
+        bitstream = self._object(bitstream_uuid, "bitstream")
+        if self._object(obj_uuid, "item") is None or bitstream is None or bitstream["parent"] != obj_uuid:
+            return self._send(404, "Not found", content_type="text/plain")
+        self.server.repository.delete(bitstream_uuid)
+        return self._send(200, "", content_type="text/plain")
+
+    def list_bitstreams(self):
+        repository = self.server.repository
+        return self._list([u for u, obj in repository.objects.items() if obj["type"] == "bitstream"])
+
+    def get_bitstream(self, obj_uuid):
+        return self._get_one(obj_uuid, "bitstream")
+
+    def put_bitstream(self, obj_uuid):
+        bitstream = self._object(obj_uuid, "bitstream")
+        if bitstream is None:
+            return self._send(404, "Not found", content_type="text/plain")
+        posted = json.loads(self.body.decode("utf-8"))
+        for key in ("name", "bundleName"):
+            if posted.get(key):
+                bitstream[key] = posted[key]
+        if posted.get("policies") is not None:
+            bitstream["policies"] = [{key: value for key, value in policy.items() if key not in ("id", "resourceId")} for policy in posted["policies"]]
+        return self._send(200, "", content_type="text/plain")
+
+    def put_bitstream_data(self, obj_uuid):
+        bitstream = self._object(obj_uuid, "bitstream")
+        if bitstream is None:
+            return self._send(404, "Not found", content_type="text/plain")
+        bitstream["data"] = self.body
+        return self._send(200, "", content_type="text/plain")
+
+    def bitstream_policy(self, obj_uuid):
+        bitstream = self._object(obj_uuid, "bitstream")
+        if bitstream is None:
+            return self._send(404, "Not found", content_type="text/plain")
+        return self._send_json([dict(policy, id=index, resourceId=obj_uuid) for index, policy in enumerate(bitstream["policies"])])
+
+    def delete_bitstream_policy(self, obj_uuid, policy_id):
+        bitstream = self._object(obj_uuid, "bitstream")
+        if bitstream is None or int(policy_id) >= len(bitstream["policies"]):
+            return self._send(404, "Not found", content_type="text/plain")
+        del bitstream["policies"][int(policy_id)]
+        return self._send(200, "", content_type="text/plain")
+
+    def retrieve_bitstream(self, obj_uuid):
+        bitstream = self._object(obj_uuid, "bitstream")
+        if bitstream is None:
+            return self._send(404, "Not found", content_type="text/plain")
+        data = bitstream["data"]
+        match = re.match(r"bytes=(\d+)-$", self.headers.get("Range", ""))
+        if match:
+            start = int(match.group(1))
+            headers = {"Content-Range": "bytes {}-{}/{}".format(start, len(data) - 1, len(data)), "Accept-Ranges": "bytes"}
+            return self._send(206, data[start:], content_type=bitstream["mimeType"], headers=headers)
+        return self._send(200, data, content_type=bitstream["mimeType"], headers={"Accept-Ranges": "bytes"})
+
+    def delete_object(self, kind, obj_uuid):
+        obj = self._object(obj_uuid, kind)
+        if obj is None:
+            return self._send(404, "Not found", content_type="text/plain")
+        self.server.repository.delete(obj_uuid)
+        return self._send(200, "", content_type="text/plain")
+
+    def delete_community(self, obj_uuid):
+        return self.delete_object("community", obj_uuid)
+
+    def delete_collection(self, obj_uuid):
+        return self.delete_object("collection", obj_uuid)
+
+    def delete_item(self, obj_uuid):
+        return self.delete_object("item", obj_uuid)
+
+    def delete_bitstream(self, obj_uuid):
+        return self.delete_object("bitstream", obj_uuid)
+
+    def get_handle(self, handle):
+        repository = self.server.repository
+        obj_uuid = repository.handles.get(handle)
+        if obj_uuid is None:
+            return self._send(404, "Not found", content_type="text/plain")
+        return self._send_json(repository.serialize(repository.objects[obj_uuid], self._expand()))
+
+
+UUID = r"([0-9a-f-]{36})"
+ROUTES = [
+    ("POST", r"/rest/login", MockRequestHandler.login),
+    ("POST", r"/rest/logout", MockRequestHandler.logout),
+    ("GET", r"/rest/status", MockRequestHandler.status),
+    ("GET", r"/rest/communities/?", MockRequestHandler.list_communities),
+    ("GET", r"/rest/communities/top-communities", MockRequestHandler.list_top_communities),
+    ("GET", r"/rest/communities/" + UUID, MockRequestHandler.get_community),
+    ("GET", r"/rest/communities/" + UUID + r"/(collections|communities)", MockRequestHandler.list_community_children),
+    ("DELETE", r"/rest/communities/" + UUID, MockRequestHandler.delete_community),
+    ("GET", r"/rest/collections/?", MockRequestHandler.list_collections),
+    ("GET", r"/rest/collections/" + UUID, MockRequestHandler.get_collection),
+    ("GET", r"/rest/collections/" + UUID + r"/items", MockRequestHandler.list_collection_items),
+    ("POST", r"/rest/collections/" + UUID + r"/items", MockRequestHandler.post_collection_item),
+    ("DELETE", r"/rest/collections/" + UUID, MockRequestHandler.delete_collection),
+    ("DELETE", r"/rest/collections/" + UUID + r"/items/" + UUID, MockRequestHandler.delete_collection_item),
+    ("GET", r"/rest/items/?", MockRequestHandler.list_items),
+    ("GET", r"/rest/items/" + UUID, MockRequestHandler.get_item),
+    ("DELETE", r"/rest/items/" + UUID, MockRequestHandler.delete_item),
+    ("GET", r"/rest/items/" + UUID + r"/metadata", MockRequestHandler.item_metadata),
+    ("POST", r"/rest/items/" + UUID + r"/metadata", MockRequestHandler.item_metadata),
+    ("PUT", r"/rest/items/" + UUID + r"/metadata", MockRequestHandler.item_metadata),
+    ("DELETE", r"/rest/items/" + UUID + r"/metadata", MockRequestHandler.item_metadata),
+    ("GET", r"/rest/items/" + UUID + r"/bitstreams", MockRequestHandler.list_item_bitstreams),
+    ("POST", r"/rest/items/" + UUID + r"/bitstreams", MockRequestHandler.post_item_bitstream),
+    ("DELETE", r"/rest/items/" + UUID + r"/bitstreams/" + UUID, MockRequestHandler.delete_item_bitstream),
+    ("GET", r"/rest/bitstreams/?", MockRequestHandler.list_bitstreams),
+    ("GET", r"/rest/bitstreams/" + UUID, MockRequestHandler.get_bitstream),
+    ("PUT", r"/rest/bitstreams/" + UUID, MockRequestHandler.put_bitstream),
+    ("DELETE", r"/rest/bitstreams/" + UUID, MockRequestHandler.delete_bitstream),
+    ("PUT", r"/rest/bitstreams/" + UUID + r"/data", MockRequestHandler.put_bitstream_data),
+    ("GET", r"/rest/bitstreams/" + UUID + r"/policy", MockRequestHandler.bitstream_policy),
+    ("DELETE", r"/rest/bitstreams/" + UUID + r"/policy/(\d+)", MockRequestHandler.delete_bitstream_policy),
+    ("GET", r"/rest/bitstreams/" + UUID + r"/retrieve", MockRequestHandler.retrieve_bitstream),
+    ("GET", r"/rest/handle/(.+)", MockRequestHandler.get_handle),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a synthetic DSpace 6 REST API for testing and benchmarking DAPPr.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--communities", type=int, default=2)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--collections", type=int, default=2)
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--bitstreams", type=int, default=2)
+    parser.add_argument("--min-size", type=int, default=1024)
+    parser.add_argument("--max-size", type=int, default=65536)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to delay each response")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of requests to answer with a 503")
+    parser.add_argument("--etags", action="store_true")
+    args = parser.parse_args()
+
+    repository = MockRepository(communities=args.communities, depth=args.depth, collections=args.collections, items=args.items,
+                                bitstreams=args.bitstreams, min_size=args.min_size, max_size=args.max_size, seed=args.seed)
+    server = MockDSpaceServer(repository, host=args.host, port=args.port, latency=args.latency,
+                              etags=args.etags, failure_rate=args.failure_rate)
+    print(server.base_url)
+    sys.stdout.flush()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
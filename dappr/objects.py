@@ -0,0 +1,175 @@
+import json
+import re
+import sys
+
+from .metadata import MetadataRecord
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if sys.version_info[:2] <= (2, 7):
+    # Python 2
+    from collections import MutableMapping
+else:
+    # Python 3
+    from collections.abc import MutableMapping
+
+
+def loads(content):
+    """
+    Decodes a JSON document, with orjson when it is installed."""
+
+    if orjson is not None:
+        return orjson.loads(content)
+    if isinstance(content, bytes):
+        content = content.decode("utf-8")
+    return json.loads(content)
+
+
+def _camel_case(name):
+    return re.sub(r"_([a-z])", lambda match: match.group(1).upper(), name)
+
+
+class DSpaceObject(MutableMapping):
+    """
+    A lightweight view of the JSON of a DSpace object.
+
+    Indexing an object, e.g. item["uuid"] or item.get("bitstreams"), returns the decoded JSON
+    exactly as a dictionary would, and the other mapping methods (pop, update, setdefault,
+    and so on) work as they do on a dictionary, so objects can be used wherever the JSON
+    dictionaries returned by DAPPr are. Attributes, e.g. item.uuid or item.last_modified,
+    return the same fields by their snake_case names, with nested DSpace objects wrapped in
+    their own classes when first accessed. Nothing is copied: changes through either
+    interface are changes to the underlying JSON, which unwrap returns. Objects are not
+    dictionaries, so json.dumps needs unwrap(obj), or default=unwrap."""
+
+    __slots__ = ("_data", "_fields")
+
+    def __init__(self, data):
+        self._data = data
+        self._fields = None
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        key = _camel_case(name)
+        if key not in self._data:
+            raise AttributeError("{} has no field {}".format(type(self).__name__, key))
+        if self._fields is None:
+            self._fields = {}
+        if key not in self._fields:
+            self._fields[key] = wrap(self._data[key])
+        return self._fields[key]
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __setitem__(self, key, value):
+        self._data[key] = unwrap(value)
+        if self._fields is not None:
+            self._fields.pop(key, None)
+
+    def __delitem__(self, key):
+        del self._data[key]
+        if self._fields is not None:
+            self._fields.pop(key, None)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __eq__(self, other):
+        if isinstance(other, DSpaceObject):
+            other = other._data
+        return self._data == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "<{} {} {!r}>".format(type(self).__name__, self._data.get("uuid"), self._data.get("name"))
+
+    def __getstate__(self):
+        return self._data
+
+    def __setstate__(self, data):
+        self._data = data
+        self._fields = None
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def keys(self):
+        return self._data.keys()
+
+    def values(self):
+        return self._data.values()
+
+    def items(self):
+        return self._data.items()
+
+
+
+class Community(DSpaceObject):
+    __slots__ = ()
+
+
+class Collection(DSpaceObject):
+    __slots__ = ()
+
+
+class Bitstream(DSpaceObject):
+    __slots__ = ()
+
+
+class Item(DSpaceObject):
+    __slots__ = ()
+
+    @property
+    def metadata(self):
+        """
+        The item's metadata as a MetadataRecord, built when first accessed. Changes to the record are written with put_item_metadata_record."""
+
+        if self._data.get("metadata") is None:
+            return None
+        if self._fields is None:
+            self._fields = {}
+        if "metadata" not in self._fields:
+            self._fields["metadata"] = MetadataRecord(self._data["metadata"])
+        return self._fields["metadata"]
+
+
+TYPES = {"community": Community, "collection": Collection, "item": Item, "bitstream": Bitstream}
+
+
+def wrap(data):
+    """
+    Returns a DSpace object's JSON as a Community, Collection, Item, or Bitstream, a list of them for a list of objects, or data itself for anything else."""
+
+    if isinstance(data, dict) and data.get("type") in TYPES:
+        return TYPES[data["type"]](data)
+    if isinstance(data, list) and data and isinstance(data[0], dict) and data[0].get("type") in TYPES:
+        return [wrap(element) for element in data]
+    return data
+
+
+def unwrap(data):
+    """
+    Returns the JSON underlying a DSpace object, or data with any objects within it replaced by their JSON."""
+
+    if isinstance(data, DSpaceObject):
+        return data._data
+    if isinstance(data, list):
+        return [unwrap(element) for element in data]
+    if isinstance(data, dict):
+        return dict((key, unwrap(value)) for key, value in data.items())
+    return data
@@ -0,0 +1,133 @@
+import csv
+import json
+import sys
+
+import humanize
+
+DIMENSIONS = ("collection", "series", "format", "bundle")
+
+
+def _series(item):
+    for entry in item.get("metadata") or []:
+        if entry.get("key") == "dc.relation.ispartofseries" and entry.get("value"):
+            return entry["value"].split(" - ")[0].strip()
+    return None
+
+
+class ExtentReport(object):
+    """
+    Totals of bitstream bytes and counts by collection, series (the first part of
+    dc.relation.ispartofseries), format (mimeType) and bundle.
+
+    Items are added one at a time and reduced to running totals, so a report only holds
+    one total for each distinct collection, series, format and bundle, and the uuids of the
+    items added. An item mapped into several collections is counted in the total of each of
+    them, but only once in the other totals, so the collection totals can add up to more
+    than the report's total. Reports built from separate sets of items can be merged."""
+
+    def __init__(self):
+        self.items = 0
+        self.bitstreams = 0
+        self.bytes = 0
+        self.totals = dict((dimension, {}) for dimension in DIMENSIONS)
+        self.collections = {}
+        self.item_uuids = set()
+
+    def add_collection(self, collection):
+        """
+        Records the name and handle of a collection, to label its totals."""
+
+        self.collections[collection["uuid"]] = {"name": collection.get("name"), "handle": collection.get("handle")}
+
+    def add_item(self, item, collection_uuid=None):
+        """
+        Adds the bitstreams of an item to the totals, or only to the total of collection_uuid if the item has already been added from another collection."""
+
+        counted = item.get("uuid") in self.item_uuids
+        if item.get("uuid"):
+            self.item_uuids.add(item["uuid"])
+        if counted:
+            for bitstream in item.get("bitstreams") or []:
+                self._add("collection", collection_uuid, bitstream.get("sizeBytes") or 0)
+            return
+        self.items += 1
+        series = _series(item)
+        for bitstream in item.get("bitstreams") or []:
+            size_bytes = bitstream.get("sizeBytes") or 0
+            self.bitstreams += 1
+            self.bytes += size_bytes
+            self._add("collection", collection_uuid, size_bytes)
+            self._add("series", series, size_bytes)
+            self._add("format", bitstream.get("mimeType") or bitstream.get("format"), size_bytes)
+            self._add("bundle", bitstream.get("bundleName"), size_bytes)
+
+    def merge(self, other):
+        """
+        Adds the totals of a report on other items to this one. Items in both reports are counted twice."""
+
+        self.item_uuids.update(other.item_uuids)
+        self.items += other.items
+        self.bitstreams += other.bitstreams
+        self.bytes += other.bytes
+        self.collections.update(other.collections)
+        for dimension, totals in other.totals.items():
+            for key, (size_bytes, count) in totals.items():
+                total = self.totals[dimension].setdefault(key, [0, 0])
+                total[0] += size_bytes
+                total[1] += count
+        return self
+
+    def _add(self, dimension, key, size_bytes):
+        total = self.totals[dimension].setdefault(key, [0, 0])
+        total[0] += size_bytes
+        total[1] += 1
+
+    def rows(self):
+        """
+        Returns a row for each collection, series, format and bundle, largest first within each, followed by the total."""
+
+        rows = []
+        for dimension in DIMENSIONS:
+            totals = sorted(self.totals[dimension].items(), key=lambda total: (-total[1][0], str(total[0])))
+            for key, (size_bytes, count) in totals:
+                row = {"dimension": dimension, "name": key, "handle": None, "bytes": size_bytes, "size": humanize.naturalsize(size_bytes), "bitstreams": count}
+                if dimension == "collection" and key in self.collections:
+                    row["name"] = self.collections[key]["name"]
+                    row["handle"] = self.collections[key]["handle"]
+                rows.append(row)
+        rows.append({"dimension": "total", "name": None, "handle": None, "bytes": self.bytes, "size": humanize.naturalsize(self.bytes), "bitstreams": self.bitstreams})
+        return rows
+
+    def as_dict(self):
+        report = {"items": self.items, "bitstreams": self.bitstreams, "bytes": self.bytes, "size": humanize.naturalsize(self.bytes)}
+        for dimension in DIMENSIONS:
+            report[dimension] = []
+        for row in self.rows():
+            if row["dimension"] != "total":
+                report[row["dimension"]].append(dict((key, value) for key, value in row.items() if key != "dimension"))
+        return report
+
+    def write(self, path):
+        """
+        Writes the report to path, as CSV if path ends with .csv and as JSON otherwise."""
+
+        if path.lower().endswith(".csv"):
+            self.write_csv(path)
+        else:
+            self.write_json(path)
+
+    def write_csv(self, path):
+        fields = ["dimension", "name", "handle", "bytes", "size", "bitstreams"]
+        if sys.version_info[0] < 3:
+            f = open(path, "wb")
+        else:
+            f = open(path, "w", newline="")
+        with f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            for row in self.rows():
+                writer.writerow(row)
+
+    def write_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.as_dict(), f, indent=4)
@@ -0,0 +1,72 @@
+import hashlib
+import os
+import time
+
+
+class UploadStream(object):
+    """
+    A file-like view of a file on disk for use as a request body. Reads return the next
+    chunk_size bytes of the file, so the file is sent in chunks of that size and only one
+    chunk is held in memory at a time. After each chunk, progress is called with the bytes
+    sent so far, the total size of the file, and the throughput in bytes per second.
+
+    The digest of the bytes read so far, using algorithm, is kept up to date as chunks are
+    read, so the checksum of an upload costs no separate pass over the file."""
+
+    def __init__(self, path, chunk_size=1024 * 1024, progress=None, algorithm="md5"):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.algorithm = algorithm
+        self.size = os.path.getsize(path)
+        self.digest = hashlib.new(algorithm)
+        self._file = open(path, "rb")
+        self._started = None
+        self._start_position = 0
+
+    def __len__(self):
+        return self.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    def tell(self):
+        return self._file.tell()
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        # seeking back, e.g. to retry a request, starts the throughput measurement and the digest over
+        position = self._file.seek(offset, whence)
+        self._started = None
+        self._start_position = self._file.tell()
+        self.digest = hashlib.new(self.algorithm)
+        if self._start_position:
+            with open(self.path, "rb") as f:
+                remaining = self._start_position
+                while remaining:
+                    chunk = f.read(min(self.chunk_size, remaining))
+                    if not chunk:
+                        break
+                    self.digest.update(chunk)
+                    remaining -= len(chunk)
+        return position
+
+    def hexdigest(self):
+        return self.digest.hexdigest()
+
+    def read(self, size=-1):
+        if self._started is None:
+            self._started = time.time()
+        chunk = self._file.read(self.chunk_size)
+        self.digest.update(chunk)
+        if chunk and self.progress is not None:
+            sent = self._file.tell()
+            elapsed = time.time() - self._started
+            throughput = (sent - self._start_position) / elapsed if elapsed > 0 else 0.0
+            self.progress(sent, self.size, throughput)
+        return chunk
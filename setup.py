@@ -9,6 +9,15 @@ setuptools.setup(
     include_package_data=True,
     install_requires=[
         "requests",
-        "humanize"
-    ]
+        "humanize",
+        "futures; python_version < '3.2'"
+    ],
+    extras_require={
+        "async": ["aiohttp"],
+        "fast": ["orjson"],
+        "test": ["pytest"]
+    },
+    entry_points={
+        "console_scripts": ["dappr=dappr.cli:main"]
+    }
 )
@@ -0,0 +1,29 @@
+import pytest
+
+from dappr import DAPPr
+from dappr.mock_server import MockDSpaceServer, MockRepository
+
+EMAIL = "user@example.com"
+PASSWORD = "password"
+
+
+@pytest.fixture
+def repository():
+    # one top-level community with a subcommunity, each with two collections of twelve items
+    return MockRepository(communities=1, depth=2, collections=2, items=12, bitstreams=2)
+
+
+@pytest.fixture
+def server(repository):
+    with MockDSpaceServer(repository) as server:
+        yield server
+
+
+@pytest.fixture
+def dspace(server):
+    return DAPPr(server.base_url, EMAIL, PASSWORD, page_size=5, backoff_factor=0.01)
+
+
+@pytest.fixture
+def top(dspace):
+    return dspace.get_top_communities(expand=())[0]
@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from dappr.client import DSpaceError
+from dappr.async_client import AsyncDAPPr
+
+
+def run(server, coroutine_fn):
+    async def main():
+        async with AsyncDAPPr(server.base_url, "user@example.com", "password", page_size=5, backoff_factor=0.01) as dspace:
+            return await coroutine_fn(dspace)
+
+    return asyncio.run(main())
+
+
+def test_error_carries_status_code(server):
+    async def get_missing(dspace):
+        with pytest.raises(DSpaceError) as error:
+            await dspace.get_item("00000000-0000-0000-0000-000000000000")
+        return error.value.status_code
+
+    assert run(server, get_missing) == 404
+
+
+def test_pages_and_concurrent_requests_match_the_client(dspace, server):
+    items = dspace.get_items(expand=())
+
+    async def fetch(dspace):
+        listed = [item["uuid"] async for item in dspace.iter_items(expand=())]
+        fetched = await asyncio.gather(*[dspace.get_item(uuid, expand=()) for uuid in listed])
+        return listed, fetched
+
+    listed, fetched = run(server, fetch)
+    assert listed == [item["uuid"] for item in items]
+    assert [item["handle"] for item in fetched] == [item["handle"] for item in items]
+
+
+def test_expired_session_logs_in_again(server):
+    async def expire_and_fetch(dspace):
+        server.sessions.clear()
+        return await dspace.get_top_communities(expand=())
+
+    assert len(run(server, expire_and_fetch)) == 1
@@ -0,0 +1,160 @@
+import json
+
+from dappr import DAPPr
+
+
+def add_suffix(record, item):
+    if item["handle"].endswith("0"):
+        record.set("dc.title", record.get("dc.title") + " (remediated)")
+
+
+def titles(repository):
+    return dict((uuid, [entry["value"] for entry in obj["metadata"] if entry["key"] == "dc.title"])
+                for uuid, obj in repository.objects.items() if obj["type"] == "item")
+
+
+def test_remediate_dry_run_writes_nothing(dspace, repository, top):
+    before = titles(repository)
+    report = dspace.remediate(top["handle"], add_suffix, dry_run=True)
+    assert report["scanned"] == 48
+    assert report["changed"] == len(report["diffs"]) > 0
+    assert report["written"] == 0
+    assert titles(repository) == before
+
+
+def test_remediate_writes_changed_items_once(dspace, repository, top):
+    report = dspace.remediate(top["handle"], add_suffix, workers=4)
+    assert report["written"] == report["changed"] > 0
+    assert report["failed"] == []
+    changed = [title for title in titles(repository).values() if title[0].endswith("(remediated)")]
+    assert len(changed) == report["changed"]
+    assert dspace.remediate(top["handle"], lambda record, item: None)["changed"] == 0
+
+
+def test_purge_dry_run_deletes_nothing(dspace, repository, top):
+    count = len(repository.objects)
+    report = dspace.purge(top["handle"], what="all")
+    assert report["dry_run"]
+    assert report["planned"] == {"bitstreams": 96, "mappings": 0, "items": 48, "collections": 4, "communities": 2}
+    assert len(repository.objects) == count
+
+
+def test_purge_unmaps_items_owned_outside_the_target(dspace, repository):
+    first, second = dspace.get_collections(expand=())[:2]
+    mapped = dspace.get_collection_items(second["uuid"], expand=())[0]
+    repository.map_item(first["uuid"], mapped["uuid"])
+    report = dspace.purge(first["handle"], what=("bitstreams", "items"), dry_run=False)
+    assert report["deleted"] == {"bitstreams": 24, "mappings": 1, "items": 12}
+    assert mapped["uuid"] in repository.objects
+    assert len(repository.objects[mapped["uuid"]]["bitstreams"]) == 2
+    assert len(dspace.get_collection_items(second["uuid"], expand=())) == 12
+
+
+def test_purge_journal_is_kept_per_kind(dspace, repository, tmpdir):
+    collection = dspace.get_collections(expand=())[0]
+    journal = str(tmpdir.join("journal.jsonl"))
+    assert dspace.purge(collection["handle"], what="policies", dry_run=False, journal=journal)["deleted"] == {"policies": 24}
+    report = dspace.purge(collection["handle"], what="bitstreams", dry_run=False, journal=journal)
+    assert report["skipped"] == 0
+    assert report["deleted"] == {"bitstreams": 24}
+
+
+def test_harvest_checkpoint(dspace, repository, tmpdir):
+    checkpoint = str(tmpdir.join("checkpoint.json"))
+    assert [status for status, _ in dspace.harvest(checkpoint)] == ["created"] * 48
+    assert list(dspace.harvest(checkpoint)) == []
+
+    items = dspace.get_items(expand=())
+    dspace.put_item_metadata(items[0]["uuid"], [{"key": "dc.title", "value": "Changed"}])
+    repository.delete(items[1]["uuid"])
+    created = dspace.post_collection_item(dspace.get_collections(expand=())[0]["uuid"], {"metadata": []})
+    changes = dict((item["uuid"], status) for status, item in dspace.harvest(checkpoint))
+    assert changes == {items[0]["uuid"]: "modified", items[1]["uuid"]: "deleted", created["uuid"]: "created"}
+    with open(checkpoint) as f:
+        assert len(json.load(f)["items"]) == 48
+
+
+def test_harvest_reports_items_changed_during_the_scan(server, repository, tmpdir):
+    # one item per page, so items can change after the scan has passed them
+    dspace = DAPPr(server.base_url, "user@example.com", "password", page_size=1)
+    checkpoint = str(tmpdir.join("checkpoint.json"))
+    uuids = [item["uuid"] for item in dspace.get_items(expand=())]
+    list(dspace.harvest(checkpoint))
+
+    class ChangeDuringScan(object):
+        pages = 0
+
+        def before_send(self, method, url, attempt):
+            if method == "GET" and url.endswith("/rest/items"):
+                self.pages += 1
+                if self.pages == 3:
+                    # the scan has passed the first item
+                    repository._touch(repository.objects[uuids[0]])
+                    repository._touch(repository.objects[uuids[3]])
+            if method == "GET" and url.split("?")[0].endswith(uuids[3]):
+                # deleted between the scan and the fetch
+                repository.delete(uuids[3])
+
+    dspace.hooks = [ChangeDuringScan()]
+    second = [(status, item["uuid"]) for status, item in dspace.harvest(checkpoint, workers=1)]
+    dspace.hooks = []
+    third = [(status, item["uuid"]) for status, item in dspace.harvest(checkpoint, workers=1)]
+    assert second == [("deleted", uuids[3])]
+    assert third == [("modified", uuids[0])]
+
+
+def test_remediate_transforms_mapped_items_once(dspace, repository, top):
+    first, second = dspace.get_collections(expand=())[:2]
+    mapped = dspace.get_collection_items(second["uuid"], expand=())[0]
+    repository.map_item(first["uuid"], mapped["uuid"])
+
+    def append_suffix(record, item):
+        if item["uuid"] == mapped["uuid"]:
+            record.set("dc.title", record.get("dc.title") + " (remediated)")
+
+    report = dspace.remediate(top["handle"], append_suffix, workers=1)
+    assert report["scanned"] == 48
+    assert report["written"] == 1
+    assert titles(repository)[mapped["uuid"]][0].count("(remediated)") == 1
+
+
+def test_bulk_ingest_retry_manifest_sends_only_what_failed(dspace, repository, tmpdir):
+    collection = dspace.get_collections(expand=())[0]
+    paths = []
+    for name in ("a.txt", "b.txt", "c.txt"):
+        path = tmpdir.join(name)
+        path.write(name * 100)
+        paths.append(str(path))
+    missing = str(tmpdir.join("missing.txt"))
+    manifest = [
+        {"metadata": [{"key": "dc.title", "value": "Complete"}], "files": paths[:2], "license": True},
+        {"metadata": [{"key": "dc.title", "value": "Incomplete"}], "files": [paths[2], missing]},
+    ]
+    report = dspace.bulk_ingest(collection["uuid"], manifest, workers=4)
+    assert (report["succeeded"], report["failed"]) == (1, 1)
+    incomplete = report["items"][1]
+    assert list(incomplete["bitstreams"]) == [paths[2]]
+    assert report["retry"] == [dict(manifest[1], item_uuid=incomplete["item_uuid"], files=[missing], license=False)]
+
+    tmpdir.join("missing.txt").write("found")
+    report = dspace.bulk_ingest(collection["uuid"], report["retry"])
+    assert (report["succeeded"], report["failed"]) == (1, 0)
+    assert len(dspace.get_collection_items(collection["uuid"], expand=())) == 14
+    assert len(repository.objects[incomplete["item_uuid"]]["bitstreams"]) == 2
+
+
+def test_apply_policy_skips_bitstreams_that_already_have_it(dspace, repository):
+    collection = dspace.get_collections(expand=())[0]
+    policy = {"action": "READ", "groupId": "staff", "rpType": "TYPE_CUSTOM"}
+    summary = dspace.apply_policy(collection["handle"], policy, workers=4)
+    assert (summary["items"], summary["bitstreams"], summary["updated"], summary["skipped"], summary["failed"]) == (12, 24, 24, 0, [])
+    summary = dspace.apply_policy(collection["handle"], dict(policy, action="read"), workers=4)
+    assert (summary["updated"], summary["skipped"]) == (0, 24)
+
+    other = {"action": "READ", "groupId": "public"}
+    summary = dspace.apply_policy(collection["handle"], other, dry_run=True)
+    assert (summary["updated"], summary["skipped"]) == (24, 0)
+    assert dspace.apply_policy(collection["handle"], other, bundles=["THUMBNAIL"])["bitstreams"] == 0
+    item = dspace.get_collection_items(collection["uuid"], expand=())[0]
+    for bitstream in dspace.get_item_bitstreams(item["uuid"], expand={"policies"}):
+        assert [p["groupId"] for p in bitstream["policies"]] == ["staff"]
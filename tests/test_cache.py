@@ -0,0 +1,68 @@
+from dappr import DAPPr, MetricsCollector
+from dappr.cache import ObjectCache
+
+
+def test_object_cache_evicts_least_recently_used_and_invalidates_nested_uuids():
+    cache = ObjectCache(maxsize=2, ttl=None)
+    cache.set("a", {"uuid": "a", "bitstreams": [{"uuid": "b1"}]})
+    cache.set("c", {"uuid": "c"})
+    assert cache.get("a") is not None
+    cache.set("d", {"uuid": "d"})
+    # "c" was used least recently
+    assert cache.get("c") is None
+    cache.invalidate("b1")
+    assert cache.get("a") is None
+    assert cache.get("d") is not None
+
+
+def test_client_writes_invalidate_cached_objects(server, repository):
+    dspace = DAPPr(server.base_url, "user@example.com", "password", page_size=5, cache_size=100)
+    metrics = dspace.add_hook(MetricsCollector())
+    item = dspace.get_items(expand=())[0]
+    bitstream_uuid = repository.objects[item["uuid"]]["bitstreams"][0]
+
+    dspace.get_item(item["uuid"], expand={"metadata", "bitstreams"})
+    dspace.get_item(item["uuid"], expand={"metadata", "bitstreams"})
+    assert metrics.as_dict()["GET /rest/items/{uuid}"]["count"] == 1
+
+    dspace.put_item_metadata(item["uuid"], [{"key": "dc.title", "value": "Changed"}])
+    cached = dspace.get_item(item["uuid"], expand={"metadata", "bitstreams"})
+    assert [entry["value"] for entry in cached["metadata"] if entry["key"] == "dc.title"] == ["Changed"]
+
+    bitstream = dspace.get_bitstream(bitstream_uuid, expand=())
+    bitstream["name"] = "renamed.bin"
+    dspace.put_bitstream(bitstream_uuid, bitstream)
+    cached = dspace.get_item(item["uuid"], expand={"metadata", "bitstreams"})
+    assert "renamed.bin" in [b["name"] for b in cached["bitstreams"]]
+    assert metrics.as_dict()["GET /rest/items/{uuid}"]["count"] == 3
+
+
+def test_response_cache_revalidates_with_etags(server, repository, tmpdir):
+    server.etags = True
+    path = str(tmpdir.join("responses.sqlite"))
+    dspace = DAPPr(server.base_url, "user@example.com", "password", response_cache_path=path)
+    item = dspace.get_items(expand=())[0]
+    dspace.response_cache.hits = dspace.response_cache.misses = 0
+
+    first = dspace.get_item(item["uuid"], expand={"metadata"})
+    assert dspace.get_item(item["uuid"], expand={"metadata"}) == first
+    repository.objects[item["uuid"]]["metadata"][0]["value"] = "Changed"
+    assert dspace.get_item(item["uuid"], expand={"metadata"})["metadata"][0]["value"] == "Changed"
+    # the first GET and the changed item were downloaded; the unchanged one was answered with a 304
+    assert (dspace.response_cache.hits, dspace.response_cache.misses) == (1, 2)
+
+
+def test_response_cache_refetches_only_changed_items_of_a_page(server, repository, tmpdir):
+    path = str(tmpdir.join("responses.sqlite"))
+    dspace = DAPPr(server.base_url, "user@example.com", "password", page_size=5, response_cache_path=path)
+    collection = dspace.get_collections(expand=())[0]
+    first = list(dspace.iter_collection_items(collection["uuid"], expand={"metadata"}))
+
+    changed = first[1]["uuid"]
+    dspace.put_item_metadata(changed, [{"key": "dc.title", "value": "Changed"}])
+    metrics = dspace.add_hook(MetricsCollector())
+    second = list(dspace.iter_collection_items(collection["uuid"], expand={"metadata"}))
+    assert [item["uuid"] for item in second] == [item["uuid"] for item in first]
+    assert [entry["value"] for entry in second[1]["metadata"] if entry["key"] == "dc.title"] == ["Changed"]
+    assert second[0] == first[0]
+    assert metrics.as_dict()["GET /rest/items/{uuid}"]["count"] == 1
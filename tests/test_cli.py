@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+from dappr.cli import main
+
+
+def run(server, *argv):
+    return main(list(argv) + ["--base-url", server.base_url, "--email", "user@example.com", "--password", "password"])
+
+
+def test_metadata_handle_needs_a_key(server):
+    with pytest.raises(SystemExit):
+        run(server, "metadata", "2027.42/1", "--value", "Title")
+
+
+def test_checkpoint_resumes_and_bad_rows_fail_their_own_job(dspace, server, repository, tmpdir, capsys):
+    items = dspace.get_items(expand=())[:3]
+    manifest = str(tmpdir.join("changes.json"))
+    with open(manifest, "w") as f:
+        json.dump([
+            {"handle": items[0]["handle"], "key": "dc.title", "value": "First"},
+            {"handle": items[1]["handle"], "key": "dc.title", "value": "Second"},
+            {"handle": items[2]["handle"], "value": "No key"},
+        ], f)
+    checkpoint = str(tmpdir.join("checkpoint.jsonl"))
+    output = str(tmpdir.join("output.jsonl"))
+
+    assert run(server, "metadata", "--manifest", manifest, "--checkpoint", checkpoint, "--output", output) == 1
+    with open(output) as f:
+        assert sorted(json.loads(line)["handle"] for line in f) == [items[0]["handle"], items[1]["handle"]]
+    for item, title in zip(items, ["First", "Second"]):
+        assert [entry["value"] for entry in repository.objects[item["uuid"]]["metadata"] if entry["key"] == "dc.title"] == [title]
+
+    # the finished jobs are skipped, and only the bad row runs (and fails) again
+    capsys.readouterr()
+    assert run(server, "metadata", "--manifest", manifest, "--checkpoint", checkpoint, "--output", output) == 1
+    assert "Skipping 2 finished jobs" in capsys.readouterr().err
+    with open(output) as f:
+        assert len(f.readlines()) == 2
@@ -0,0 +1,167 @@
+import hashlib
+import os
+
+import humanize
+
+from dappr import MetricsCollector
+
+
+def test_extent_is_the_same_serial_and_concurrent(dspace, repository, top):
+    serial = dspace.get_handle_extent(top["handle"], workers=1)
+    concurrent = dspace.get_handle_extent(top["handle"], workers=8)
+    assert serial == concurrent == humanize.naturalsize(repository.total_bytes(top["uuid"]))
+
+
+def test_extent_report_totals(dspace, repository, top):
+    report = dspace.extent_report(top["handle"], workers=4)
+    assert report.items == 48
+    assert report.bitstreams == 96
+    assert report.bytes == repository.total_bytes(top["uuid"])
+
+
+def test_pagination_counts_every_item(dspace, server):
+    metrics = dspace.add_hook(MetricsCollector())
+    assert len(list(dspace.iter_items(expand=()))) == 48
+    # nine full pages of five, a last page of three, and the empty page that ends the listing
+    assert metrics.as_dict()["GET /rest/items"]["count"] == 11
+
+
+def test_pagination_continues_past_short_pages(dspace, repository):
+    uuids = [item["uuid"] for item in dspace.iter_items(expand=())]
+    repository.withdraw_item(uuids[2])
+    assert [item["uuid"] for item in dspace.iter_items(expand=())] == uuids[:2] + uuids[3:]
+
+
+def test_collection_items_are_paginated(dspace):
+    for collection in dspace.get_collections(expand=()):
+        assert len(dspace.get_collection_items(collection["uuid"], expand=())) == 12
+        assert len(list(dspace.iter_collection_items(collection["uuid"], page_size=100, expand=()))) == 12
+
+
+def test_download_resumes_partial_file(dspace, repository, tmpdir):
+    bitstream = dspace.get_bitstreams(expand=())[0]
+    data = repository.objects[bitstream["uuid"]]["data"]
+    path = str(tmpdir.join("download.bin"))
+    with open(path + ".part", "wb") as f:
+        f.write(data[:1000])
+    statuses = []
+
+    class Hook(object):
+        def after_response(self, method, url, response, seconds, attempt):
+            if url.endswith("/retrieve"):
+                statuses.append(response.status_code)
+
+    dspace.add_hook(Hook())
+    dspace.download_bitstream(bitstream["uuid"], path)
+    assert statuses == [206]
+    with open(path, "rb") as f:
+        assert f.read() == data
+    assert not os.path.exists(path + ".part")
+
+
+def test_download_discards_corrupt_partial_file(dspace, repository, tmpdir):
+    bitstream = dspace.get_bitstreams(expand=())[0]
+    data = repository.objects[bitstream["uuid"]]["data"]
+    path = str(tmpdir.join("download.bin"))
+    with open(path + ".part", "wb") as f:
+        f.write(b"x" * 1000)
+    try:
+        dspace.download_bitstream(bitstream["uuid"], path)
+    except Exception:
+        pass
+    # a failed checksum removes the partial file, so the next attempt downloads from the start
+    dspace.download_bitstream(bitstream["uuid"], path)
+    with open(path, "rb") as f:
+        assert hashlib.md5(f.read()).hexdigest() == hashlib.md5(data).hexdigest()
+
+
+def test_export_gives_bitstreams_with_the_same_name_their_own_files(dspace, tmpdir):
+    item = dspace.get_items(expand=())[0]
+    for bitstream in dspace.get_item_bitstreams(item["uuid"], expand=()):
+        dspace.put_bitstream(bitstream["uuid"], dict(bitstream, name="same.pdf"))
+    dest = str(tmpdir)
+    assert dspace.export_handle(item["handle"], dest)["downloaded"] == 2
+    assert dspace.export_handle(item["handle"], dest) == {"downloaded": 0, "skipped": 2, "bytes": 0, "failed": []}
+
+
+def test_login_and_session_checks_reach_hooks(dspace):
+    metrics = dspace.add_hook(MetricsCollector())
+    dspace.session.cookies.clear()
+    dspace.session.cookies.set("JSESSIONID", "expired")
+    dspace.get_items(expand=())
+    requests = metrics.as_dict()
+    assert requests["GET /rest/status"]["count"] == 1
+    assert requests["POST /rest/login"]["count"] == 1
+
+
+def test_build_index_refresh_fetches_only_changed_items(dspace, repository, top, tmpdir):
+    path = str(tmpdir.join("index.sqlite"))
+    index = dspace.build_index(top["handle"], path, workers=4)
+    assert len(index.items(top["uuid"])) == 48
+    assert index.extent(top["uuid"]) == repository.total_bytes(top["uuid"])
+    index.close()
+
+    items = dspace.get_items(expand=())
+    collection = dspace.get_collections(expand=())[0]
+    repository.add_bitstream(items[0]["uuid"], size=1000)
+    repository.delete(items[1]["uuid"])
+    added = repository.add_item(collection["uuid"])
+    repository.add_bitstream(added["uuid"], size=2000)
+
+    metrics = dspace.add_hook(MetricsCollector())
+    index = dspace.build_index(top["handle"], path, workers=4)
+    # only the bitstreams of the changed and the new item are fetched, each a page and the empty page that ends it
+    assert metrics.as_dict()["GET /rest/items/{uuid}/bitstreams"]["count"] == 4
+    assert len(index.items(top["uuid"])) == 48
+    assert index.get(items[1]["uuid"]) is None
+    assert index.extent(top["uuid"]) == repository.total_bytes(top["uuid"])
+    index.close()
+
+
+def test_extent_report_counts_mapped_items_once(dspace, repository, top, tmpdir):
+    first, second = dspace.get_collections(expand=())[:2]
+    mapped = dspace.get_collection_items(second["uuid"], expand=())[0]
+    repository.map_item(first["uuid"], mapped["uuid"])
+    mapped_bytes = repository.total_bytes(mapped["uuid"])
+
+    report = dspace.extent_report(top["handle"], workers=4)
+    index = dspace.build_index(top["handle"], str(tmpdir.join("index.sqlite")))
+    assert report.items == 48
+    assert report.bitstreams == 96
+    assert report.bytes == index.extent(top["uuid"]) == repository.total_bytes(top["uuid"]) - mapped_bytes
+    collections = dict((row["handle"], row["bytes"]) for row in report.as_dict()["collection"])
+    assert collections[first["handle"]] == repository.total_bytes(first["uuid"])
+    assert sum(collections.values()) == report.bytes + mapped_bytes
+    index.close()
+
+
+def upper_case_checksums(repository, monkeypatch):
+    serialize = repository.serialize
+
+    def serialize_upper(obj, expand=()):
+        data = serialize(obj, expand)
+        for bitstream in [data] + (data.get("bitstreams") or []):
+            if bitstream.get("checkSum"):
+                bitstream["checkSum"]["value"] = bitstream["checkSum"]["value"].upper()
+        return data
+
+    monkeypatch.setattr(repository, "serialize", serialize_upper)
+
+
+
+def test_download_accepts_upper_case_checksums(dspace, repository, monkeypatch, tmpdir):
+    upper_case_checksums(repository, monkeypatch)
+    item = dspace.get_items(expand=())[0]
+    bitstream = dspace.get_item_bitstreams(item["uuid"], expand=())[0]
+    path = str(tmpdir.join("download.bin"))
+    dspace.download_bitstream(bitstream["uuid"], path)
+    with open(path, "rb") as f:
+        assert f.read() == repository.objects[bitstream["uuid"]]["data"]
+
+
+def test_export_skips_files_matching_upper_case_checksums(dspace, repository, monkeypatch, tmpdir):
+    upper_case_checksums(repository, monkeypatch)
+    collection = dspace.get_collections(expand=())[0]
+    assert dspace.export_handle(collection["handle"], str(tmpdir))["downloaded"] == 24
+    summary = dspace.export_handle(collection["handle"], str(tmpdir))
+    assert (summary["downloaded"], summary["skipped"]) == (0, 24)
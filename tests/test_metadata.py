@@ -0,0 +1,100 @@
+import requests
+
+from dappr import DAPPr, MetadataRecord
+
+
+def test_set_keeps_language_and_fields_of_replaced_entries():
+    record = MetadataRecord([{"key": "dc.title", "value": "A", "language": "en_US", "authority": None}])
+    record.set("dc.title", "B")
+    assert record.to_list() == [{"key": "dc.title", "value": "B", "language": "en_US", "authority": None}]
+    assert record.diff() == [{"key": "dc.title", "removed": ["A"], "added": ["B"]}]
+
+
+def test_set_extra_values_take_fields_of_last_entry():
+    record = MetadataRecord([{"key": "dc.subject", "value": "A", "language": "en_US"}])
+    record.set("dc.subject", ["B", "C"])
+    assert [entry["language"] for entry in record.entries("dc.subject")] == ["en_US", "en_US"]
+
+
+def test_set_with_language_replaces_language():
+    record = MetadataRecord([{"key": "dc.title", "value": "A", "language": "en_US"}])
+    record.set("dc.title", "A", language="fr")
+    assert record.to_list() == [{"key": "dc.title", "value": "A", "language": "fr"}]
+    assert record.changed_keys() == ["dc.title"]
+
+
+def test_set_same_value_is_not_a_change():
+    record = MetadataRecord([{"key": "dc.title", "value": "A", "language": "en_US"}])
+    record.set("dc.title", "A")
+    assert not record.dirty
+
+
+def test_update_metadata_entry_by_key_keeps_language():
+    dspace = DAPPr.__new__(DAPPr)
+    record = MetadataRecord([
+        {"key": "dc.title", "value": "Title", "language": "en_US"},
+        {"key": "dc.relation.ispartofseries", "value": "Series - Subseries", "language": "en_US"},
+    ])
+    dspace.update_metadata_entry_by_key(record, "dc.title", "Subseries - Title")
+    dspace.update_metadata_entry_by_key(record, "dc.relation.ispartofseries", "Series")
+    assert record.to_list() == [
+        {"key": "dc.title", "value": "Subseries - Title", "language": "en_US"},
+        {"key": "dc.relation.ispartofseries", "value": "Series", "language": "en_US"},
+    ]
+
+
+def _removing_every_subject(dspace, item_uuid):
+    record = dspace.get_item_metadata_record(item_uuid)
+    record.append("dc.subject", "Subject")
+    dspace.put_item_metadata_record(item_uuid, record)
+    record = dspace.get_item_metadata_record(item_uuid)
+    record.remove("dc.subject")
+    return record
+
+
+def _sorted(metadata):
+    return sorted((entry["key"], entry["value"]) for entry in metadata)
+
+
+def test_removing_a_key_does_not_duplicate_kept_fields(dspace, repository):
+    item = dspace.get_items(expand=())[0]
+    record = _removing_every_subject(dspace, item["uuid"])
+    dspace.put_item_metadata_record(item["uuid"], record)
+    assert _sorted(repository.objects[item["uuid"]]["metadata"]) == _sorted(record.to_list())
+    assert "dc.subject" not in [entry["key"] for entry in repository.objects[item["uuid"]]["metadata"]]
+
+
+def test_failed_repost_is_retried(dspace, repository):
+    item = dspace.get_items(expand=())[0]
+    record = _removing_every_subject(dspace, item["uuid"])
+
+    class FailFirstPost(object):
+        failed = False
+
+        def before_send(self, method, url, attempt):
+            if method == "POST" and url.endswith("/metadata") and not self.failed:
+                self.failed = True
+                raise requests.exceptions.ConnectionError("connection reset")
+
+    dspace.hooks = [FailFirstPost()]
+    dspace.put_item_metadata_record(item["uuid"], record)
+    assert dspace.hooks[0].failed
+    assert _sorted(repository.objects[item["uuid"]]["metadata"]) == _sorted(record.to_list())
+
+
+def test_repost_with_lost_response_is_not_applied_twice(dspace, repository):
+    item = dspace.get_items(expand=())[0]
+    record = _removing_every_subject(dspace, item["uuid"])
+
+    class LoseFirstResponse(object):
+        lost = False
+
+        def after_response(self, method, url, response, elapsed, attempt):
+            if method == "POST" and url.endswith("/metadata") and not self.lost:
+                self.lost = True
+                raise requests.exceptions.ConnectionError("connection reset")
+
+    dspace.hooks = [LoseFirstResponse()]
+    dspace.put_item_metadata_record(item["uuid"], record)
+    assert dspace.hooks[0].lost
+    assert _sorted(repository.objects[item["uuid"]]["metadata"]) == _sorted(record.to_list())
@@ -0,0 +1,33 @@
+import json
+
+from dappr import DAPPr, Bitstream, Collection, Community, Item
+from dappr.objects import unwrap
+
+
+def test_objects_are_returned_by_getters_iterators_and_posts(server, repository, tmpdir):
+    dspace = DAPPr(server.base_url, "user@example.com", "password", page_size=5, objects=True)
+    community = dspace.get_top_communities(expand=())[0]
+    assert isinstance(community, Community)
+    collection = next(dspace.iter_collections(expand=()))
+    assert isinstance(collection, Collection)
+
+    item = dspace.get_item(dspace.get_items(expand=())[0].uuid, expand={"metadata", "bitstreams", "parentCollection"})
+    assert isinstance(item, Item)
+    assert item.uuid == item["uuid"]
+    assert item.parent_collection.uuid in repository.objects
+    assert all(isinstance(bitstream, Bitstream) for bitstream in item.bitstreams)
+    assert item.metadata.get("dc.title") == repository.objects[item.uuid]["name"]
+    assert json.loads(json.dumps(unwrap(item)))["uuid"] == item.uuid
+
+    posted = dspace.post_collection_item(collection.uuid, {"metadata": [{"key": "dc.title", "value": "Posted"}]})
+    assert isinstance(posted, Item)
+    path = tmpdir.join("file.txt")
+    path.write("data")
+    bitstream = dspace.post_item_bitstream(posted.uuid, str(path))
+    assert isinstance(bitstream, Bitstream)
+    assert bitstream.size_bytes == 4
+
+    # objects can be passed straight back
+    bitstream["name"] = "renamed.txt"
+    dspace.put_bitstream(bitstream.uuid, bitstream)
+    assert repository.objects[bitstream.uuid]["name"] == "renamed.txt"
@@ -0,0 +1,62 @@
+import hashlib
+import os
+
+import pytest
+
+from dappr.client import DSpaceError
+from dappr.upload import UploadStream
+
+
+def write(tmpdir, data):
+    path = tmpdir.join("data.bin")
+    path.write_binary(data)
+    return str(path)
+
+
+def read_all(stream):
+    chunks = []
+    while True:
+        chunk = stream.read()
+        if not chunk:
+            return b"".join(chunks)
+        chunks.append(chunk)
+
+
+def test_reads_in_chunks_and_reports_progress(tmpdir):
+    data = os.urandom(10000)
+    calls = []
+    with UploadStream(write(tmpdir, data), chunk_size=4096, progress=lambda sent, total, rate: calls.append((sent, total))) as stream:
+        assert len(stream) == 10000
+        assert stream.read() == data[:4096]
+        assert read_all(stream) == data[4096:]
+        assert stream.hexdigest() == hashlib.md5(data).hexdigest()
+    assert calls == [(4096, 10000), (8192, 10000), (10000, 10000)]
+
+
+def test_seeking_keeps_the_digest_of_the_whole_file(tmpdir):
+    data = os.urandom(10000)
+    with UploadStream(write(tmpdir, data), chunk_size=4096, algorithm="sha1") as stream:
+        read_all(stream)
+        # a retried request starts over from the beginning, or resumes from an offset
+        stream.seek(0)
+        assert read_all(stream) == data
+        assert stream.hexdigest() == hashlib.sha1(data).hexdigest()
+        stream.seek(5000)
+        assert read_all(stream) == data[5000:]
+        assert stream.hexdigest() == hashlib.sha1(data).hexdigest()
+
+
+def test_upload_corrupted_in_transit_is_reported(dspace, repository, monkeypatch, tmpdir):
+    item = dspace.get_items(expand=())[0]
+    path = write(tmpdir, b"x" * 5000)
+    add_bitstream = repository.add_bitstream
+
+    def corrupt(item_uuid, data=None, **kwargs):
+        return add_bitstream(item_uuid, data=data[:-1] + b"\0", **kwargs)
+
+    monkeypatch.setattr(repository, "add_bitstream", corrupt)
+    with pytest.raises(DSpaceError) as error:
+        dspace.post_item_bitstream(item["uuid"], path)
+    assert "does not match" in str(error.value)
+    # without verification, the corrupt upload is returned as is
+    assert dspace.post_item_bitstream(item["uuid"], path, verify_checksum=False)["sizeBytes"] == 5000